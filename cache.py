@@ -0,0 +1,123 @@
+# Projection cache.
+# Keeps the projections of the last configurations, with the histories that were filled in before they
+# were put (all of them in roller_cli.py, the balance the graph plots in the window), so going back
+# to one of them doesn't project and fill it again. Least recently used entries get evicted first, once there
+# are too many of them or their memory goes over max_bytes, and entries can also be kept on disk to survive
+# between sessions.
+from collections import OrderedDict
+import os
+import pickle
+import threading
+
+from incremental import input_key
+
+def projection_nbytes(projection):
+    # Memory used by a projection: its purchase events and the histories filled in so far
+    segments = (projection.segment_step, projection.segment_balance, projection.segment_power, projection.segment_bonus)
+    return projection.history_nbytes() + sum(array.nbytes for array in segments)
+
+class ProjectionCache():
+    def __init__(self, max_entries = 16, directory = None, max_disk_entries = 256, max_bytes = 1 << 30):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes # Memory of the entries kept in memory, measured when they're put
+        self.directory = directory # Optional, entries are only kept in memory without it
+        self.max_disk_entries = max_disk_entries
+        self.entries = OrderedDict() # Key -> projection, most recently used last
+        self.entry_nbytes = {} # Key -> memory of the entry
+        self.nbytes = 0
+        self.hits = 0
+        self.disk_hits = 0 # Part of the hits that had to be read from disk
+        self.misses = 0
+        self.lock = threading.Lock() # Results can be put from the callback threads of the process pool
+        if directory is not None:
+            os.makedirs(directory, exist_ok = True)
+
+    @staticmethod
+    def key(balance, total_power, total_bonus, network_power, block_reward, days, scenarios, **options):
+        # Canonical key of a projection, the same inputs always give the same key.
+        # `options` are the ones of simulation.project (step, history_interval, history_dtype).
+        return input_key(balance, total_power, total_bonus, network_power, block_reward, days, scenarios, options)
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.pickle")
+
+    def get(self, key):
+        # Returns the cached projection, or None
+        with self.lock:
+            return self.load(key)
+
+    def load(self, key):
+        projection = self.entries.get(key)
+        if projection is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return projection
+
+        if self.directory is not None and os.path.exists(self.path(key)):
+            try:
+                with open(self.path(key), "rb") as file:
+                    projection = pickle.load(file)
+            except (OSError, pickle.UnpicklingError, EOFError):
+                projection = None # Broken file, it gets replaced by the next put
+            if projection is not None:
+                os.utime(self.path(key)) # Most recently used on disk too
+                self.hits += 1
+                self.disk_hits += 1
+                self.remember(key, projection)
+                return projection
+
+        self.misses += 1
+        return None
+
+    def remember(self, key, projection):
+        # A projection bigger than max_bytes on its own isn't kept in memory at all
+        if key in self.entries:
+            self.nbytes -= self.entry_nbytes.pop(key)
+        self.entries[key] = projection
+        self.entries.move_to_end(key)
+        self.entry_nbytes[key] = projection_nbytes(projection)
+        self.nbytes += self.entry_nbytes[key]
+        while self.entries and (len(self.entries) > self.max_entries or self.nbytes > self.max_bytes):
+            evicted, _ = self.entries.popitem(last = False)
+            self.nbytes -= self.entry_nbytes.pop(evicted)
+
+    def put(self, key, projection):
+        with self.lock:
+            self.store(key, projection)
+
+    def store(self, key, projection):
+        self.remember(key, projection)
+        if self.directory is None:
+            return
+
+        # Write to a temporary file first, so a crash never leaves half a file behind
+        temporary_path = self.path(key) + ".tmp"
+        with open(temporary_path, "wb") as file:
+            pickle.dump(projection, file, protocol = pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_path, self.path(key))
+
+        files = sorted((entry for entry in os.scandir(self.directory) if entry.name.endswith(".pickle")),
+                       key = lambda entry: entry.stat().st_mtime)
+        for entry in files[:max(0, len(files) - self.max_disk_entries)]:
+            os.remove(entry.path)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.entry_nbytes.clear()
+            self.nbytes = 0
+            if self.directory is not None:
+                for entry in os.scandir(self.directory):
+                    if entry.name.endswith(".pickle"):
+                        os.remove(entry.path)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0,
+            "entries": len(self.entries),
+            "bytes": self.nbytes
+        }
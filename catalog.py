@@ -0,0 +1,98 @@
+# Miner catalog.
+# Imports the miners of the market (thousands of rows) from a CSV or JSON file and indexes them,
+# so scenarios can be built by looking miners up instead of typing them, and can refer to them by id.
+#
+# CSV files have the columns name, hashrate, bonus and price (and optionally id), JSON files hold
+# a list of objects with the same fields. Hashrates are like everywhere else, "15.7 Ph/s" or Gh/s.
+import csv
+import json
+import os
+
+import numpy as np
+
+from expressions import to_number
+from simulation import Scenario, parse_power
+
+CATALOG_FORMATS = {".csv": "csv", ".json": "json"}
+
+class MinerCatalog():
+    # Columns of the catalog are arrays (one value per miner), with three indexes built once:
+    #   - names, lower case, for searching by name
+    #   - miners sorted by price, for price ranges
+    #   - miners sorted by hashrate per RLT, best first
+    def __init__(self, names, hashrates, bonuses, prices, ids = None):
+        self.names = list(names)
+        self.ids = [str(miner_id) for miner_id in ids] if ids is not None else [str(index + 1) for index in range(len(self.names))]
+        self.row_of_id = {miner_id: row for row, miner_id in enumerate(self.ids)}
+        if len(self.row_of_id) != len(self.ids):
+            raise ValueError("Miner ids must be unique.")
+
+        # Checks every miner at once, like Scenario.from_arrays
+        self.miners = Scenario.from_arrays(hashrates, bonuses, prices)
+        if len(self.miners) != len(self.names) or len(self.ids) != len(self.names):
+            raise ValueError("Every miner needs a name, a hashrate, a bonus and a price.")
+
+        self.lower_names = np.array([name.lower() for name in self.names], dtype = str)
+        self.price_order = np.argsort(self.miners.prices, kind = "stable")
+        self.sorted_prices = self.miners.prices[self.price_order]
+        with np.errstate(divide = "ignore"):
+            self.efficiency = np.where(self.miners.prices > 0, self.miners.hashrates / self.miners.prices, np.inf)
+        self.efficiency_order = np.argsort(-self.efficiency, kind = "stable")
+
+    @classmethod
+    def from_rows(cls, rows):
+        # rows example: [{"id": "rlt-3", "name": "Rollertron", "hashrate": "110 Th/s", "bonus": 3, "price": 7}, ...]
+        rows = list(rows)
+        ids = None
+        if rows and all(row.get("id") not in (None, "") for row in rows):
+            ids = [row["id"] for row in rows]
+
+        hashrates, bonuses, prices = [], [], []
+        for index, row in enumerate(rows):
+            try:
+                hashrates.append(parse_power(row["hashrate"]))
+                bonuses.append(to_number(row["bonus"]))
+                prices.append(to_number(row["price"]))
+            except (KeyError, ValueError) as error:
+                raise ValueError(f"Miner {index + 1} of the catalog: {error}")
+        return cls([str(row.get("name") or f"Miner {index + 1}") for index, row in enumerate(rows)],
+                   hashrates, bonuses, prices, ids)
+
+    @classmethod
+    def read(cls, path):
+        catalog_format = CATALOG_FORMATS.get(os.path.splitext(path)[1].lower())
+        if catalog_format is None:
+            raise ValueError(f"Unknown catalog format ({path}), expected one of: {', '.join(CATALOG_FORMATS)}.")
+
+        with open(path, newline = "") as file:
+            if catalog_format == "csv":
+                return cls.from_rows(csv.DictReader(file))
+            return cls.from_rows(json.load(file))
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, miner_id):
+        return str(miner_id) in self.row_of_id
+
+    def row(self, miner_id):
+        try:
+            return self.row_of_id[str(miner_id)]
+        except KeyError:
+            raise KeyError(f"There is no miner with id {miner_id} in the catalog.")
+
+    def __getitem__(self, miner_id):
+        return self.miners[self.row(miner_id)]
+
+    def search_rows(self, text = "", low = 0, high = np.inf, by_efficiency = False):
+        # Rows of the miners whose name contains `text` (case insensitive) with low <= price <= high,
+        # cheapest first or with the most Gh/s per RLT first. The price range and the order both come
+        # from the indexes, so nothing gets sorted again.
+        order = self.efficiency_order if by_efficiency else self.price_order
+        keep = np.zeros(len(self), dtype = bool)
+        start = np.searchsorted(self.sorted_prices, low, side = "left")
+        end = np.searchsorted(self.sorted_prices, high, side = "right")
+        keep[self.price_order[start:end]] = True
+        if text:
+            keep &= np.char.find(self.lower_names, text.lower()) >= 0
+        return order[keep[order]]
@@ -0,0 +1,94 @@
+# Multi-currency projection.
+# Power is split between several currencies, each one with its own network power and block reward.
+# Everything that gets mined is converted to a common unit (RLT by default) to buy miners.
+import numpy as np
+
+from simulation import BLOCKS_PER_DAY, cumulative_yields, pack_scenarios, project_packed, step_yields, steps_in, yield_until
+
+CURRENCY_FIELDS = ("reward", "mined")
+
+class CurrencyProjection():
+    # A Projection (whose balance is in the common unit) plus what each currency brings in.
+    # Per-currency values are (currency x step) arrays, the histories are (scenario x currency x time) arrays.
+    def __init__(self, projection, names, allocations, rates, currency_yield):
+        self.projection = projection
+        self.names = names
+        self.allocations = allocations # Ratio of the power mining each currency
+        self.rates = rates # Value of one coin in the common unit
+        self.currency_yield = currency_yield # Coins mined by 1 Gh/s (with bonus) during each step
+        self.currency_cumulative_yield = cumulative_yields(currency_yield)
+        self._histories = {}
+
+    def __len__(self):
+        return len(self.projection)
+
+    def mined_per_gh(self, steps):
+        # (currency x ...) coins mined by 1 Gh/s (with bonus) until `steps` steps have passed
+        return np.array([yield_until(self.currency_yield[c], self.currency_cumulative_yield[c], None, steps)
+                         for c in range(len(self.names))])
+
+    def currency_history(self, field):
+        # Returns the (scenario x currency x time) array of one of the CURRENCY_FIELDS:
+        #   - "reward": coins mined per 10 mins at each time.
+        #   - "mined": coins mined since the start of the projection, before any conversion.
+        if field not in CURRENCY_FIELDS:
+            raise ValueError(f"Unknown currency history field ({field}).")
+
+        if field not in self._histories:
+            projection = self.projection
+            allocations = self.allocations[None, :, None]
+            bonused_power = projection.history("bonused_power")[:, None, :]
+            steps = projection.history_steps()
+
+            if field == "reward":
+                step_index = np.clip(np.ceil(steps).astype(np.int64) - 1, 0, projection.steps - 1)
+                value = bonused_power * allocations * self.currency_yield[:, step_index] / (BLOCKS_PER_DAY * projection.step)
+            else:
+                # Coins mined by each segment, up to the start of each history value's segment
+                segment_bonused_power = projection.segment_power * (1 + projection.segment_bonus)
+                segment_mined = self.mined_per_gh(projection.segment_step) # (currency x scenario x segment)
+                mined_before = np.zeros_like(segment_mined)
+                mined_before[:, :, 1:] = np.cumsum(segment_bonused_power[:, :-1] * np.diff(segment_mined, axis = 2), axis = 2)
+
+                segment = projection.segment_of_times()
+                mined_before = np.take_along_axis(mined_before, np.broadcast_to(segment, mined_before.shape[:2] + segment.shape[1:]), axis = 2)
+                segment_start = np.take_along_axis(segment_mined, np.broadcast_to(segment, mined_before.shape), axis = 2)
+                mined = mined_before + projection.history("bonused_power")[None] * (self.mined_per_gh(steps)[:, None, :] - segment_start)
+                value = np.moveaxis(mined, 0, 1) * allocations
+
+            self._histories[field] = value
+
+        return self._histories[field]
+
+def currency_arrays(currencies, days, step = 1):
+    # Turns currency descriptions into arrays: names, allocations (ratios), rates and the
+    # (currency x step) coins mined by 1 Gh/s (with bonus) during each step.
+    # currencies example: [{"name": "RLT", "network_power": 5.3e9, "block_reward": 30, "allocation": 60, "rate": 1}, ...]
+    # allocation is the percentage of power mining the currency, and rate the value of one coin in the common unit.
+    # network_power, block_reward and rate can be schedules (see schedules.py).
+    if not currencies:
+        raise ValueError("At least one currency is required.")
+
+    steps = steps_in(days, step)
+    names = [currency.get("name", f"Currency {index + 1}") for index, currency in enumerate(currencies)]
+    allocations = np.array([float(currency["allocation"]) for currency in currencies]) / 100
+    if allocations.min() < 0 or allocations.sum() > 1 + 1e-9:
+        raise ValueError("Currency allocations must be positive and add up to 100% at most.")
+
+    rates = np.array([np.broadcast_to(np.asarray(currency.get("rate", 1), dtype = float), (steps,)) for currency in currencies])
+    currency_yield = np.array([np.broadcast_to(step_yields(currency["network_power"], currency["block_reward"], steps, step), (steps,))
+                               for currency in currencies])
+    return names, allocations, rates, currency_yield
+
+def project_currencies(balance, total_power, total_bonus, currencies, days, scenarios, step = 1, history_interval = 1,
+                       history_dtype = "float64"):
+    # Projects every scenario while mining several currencies at once (see currency_arrays) and returns
+    # a CurrencyProjection. The balance, and the prices of the miners, are in the common unit.
+    names, allocations, rates, currency_yield = currency_arrays(currencies, days, step)
+
+    # What 1 Gh/s (with bonus) earns in the common unit during each step, all currencies together
+    step_yield = (allocations[:, None] * rates * currency_yield).sum(axis = 0)
+
+    projection = project_packed(balance, total_power, total_bonus, step_yield, days, *pack_scenarios(scenarios),
+                                step = step, history_interval = history_interval, history_dtype = history_dtype)
+    return CurrencyProjection(projection, names, allocations, rates, currency_yield)
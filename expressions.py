@@ -0,0 +1,141 @@
+# Safe arithmetic expressions.
+# Number fields accept small calculations like "12.5 * 3 + 1", these get parsed here instead of going
+# through eval, so values from imported files can't run any code. Only numbers, + - * / // % **
+# and parentheses are allowed. Results are cached, since the same values come back on every Generate.
+from functools import lru_cache
+import math
+import re
+
+MAX_LENGTH = 256 # Longer expressions are refused
+MAX_DEPTH = 32 # Deepest nesting of parentheses
+
+TOKEN = re.compile(r"\s*(?:(\d+\.?\d*(?:[eE][-+]?\d+)?|\.\d+(?:[eE][-+]?\d+)?)|(\*\*|//|[-+*/%()]))")
+
+class ExpressionError(ValueError):
+    pass
+
+def tokenize(text):
+    # Returns the list of tokens, numbers already converted to floats
+    tokens = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = TOKEN.match(text, position)
+        if match is None:
+            raise ExpressionError(f"Unexpected character at position {position + 1} in \"{text}\".")
+        number, operator = match.groups()
+        tokens.append(float(number) if number is not None else operator)
+        position = match.end()
+    return tokens
+
+class Parser():
+    # Recursive descent with the same precedence as Python:
+    #   expression := term (("+" | "-") term)*
+    #   term       := unary (("*" | "/" | "//" | "%") unary)*
+    #   unary      := ("+" | "-") unary | power
+    #   power      := atom ("**" unary)?
+    #   atom       := number | "(" expression ")"
+    def __init__(self, tokens, text):
+        self.tokens = tokens
+        self.text = text
+        self.position = 0
+        self.depth = 0
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def take(self):
+        token = self.peek()
+        self.position += 1
+        return token
+
+    def error(self, message):
+        return ExpressionError(f"{message} in \"{self.text}\".")
+
+    def parse(self):
+        if not self.tokens:
+            raise self.error("Empty expression")
+        value = self.expression()
+        if self.peek() is not None:
+            raise self.error(f"Unexpected \"{self.peek()}\"")
+        return value
+
+    def expression(self):
+        value = self.term()
+        while self.peek() in ("+", "-"):
+            if self.take() == "+":
+                value += self.term()
+            else:
+                value -= self.term()
+        return value
+
+    def term(self):
+        value = self.unary()
+        while self.peek() in ("*", "/", "//", "%"):
+            operator = self.take()
+            operand = self.unary()
+            if operator == "*":
+                value *= operand
+            elif operand == 0:
+                raise self.error("Division by zero")
+            elif operator == "/":
+                value /= operand
+            elif operator == "//":
+                value //= operand
+            else:
+                value %= operand
+        return value
+
+    def unary(self):
+        if self.peek() == "-":
+            self.take()
+            return -self.unary()
+        if self.peek() == "+":
+            self.take()
+            return self.unary()
+        return self.power()
+
+    def power(self):
+        value = self.atom()
+        if self.peek() == "**":
+            self.take()
+            exponent = self.unary()
+            try:
+                value = value ** exponent
+            except (OverflowError, ZeroDivisionError):
+                raise self.error("Result out of range")
+            if isinstance(value, complex):
+                raise self.error("Result isn't a real number")
+        return value
+
+    def atom(self):
+        token = self.take()
+        if isinstance(token, float):
+            return token
+        if token == "(":
+            self.depth += 1
+            if self.depth > MAX_DEPTH:
+                raise self.error("Too many nested parentheses")
+            value = self.expression()
+            if self.take() != ")":
+                raise self.error("Missing \")\"")
+            self.depth -= 1
+            return value
+        raise self.error("Unexpected end" if token is None else f"Unexpected \"{token}\"")
+
+@lru_cache(maxsize = 65536)
+def evaluate(text):
+    # Returns the value of an arithmetic expression as a float, raises ExpressionError if it isn't one.
+    # See evaluate.cache_info() for how often the cache gets used.
+    if len(text) > MAX_LENGTH:
+        raise ExpressionError(f"Expression longer than {MAX_LENGTH} characters.")
+    value = Parser(tokenize(text), text.strip()).parse()
+    if not math.isfinite(value):
+        raise ExpressionError(f"Result out of range in \"{text.strip()}\".")
+    return value
+
+def to_number(value):
+    # Numbers are returned as floats, strings are evaluated as expressions
+    if isinstance(value, str):
+        return evaluate(value)
+    return float(value)
@@ -0,0 +1,191 @@
+# Incremental projection.
+# The purchase events of each scenario are kept as checkpoints between two projections, so when only
+# a miner (or nothing) changed in a scenario, it gets re-projected from the first miner that changed
+# instead of from day 0. Scenarios that didn't change at all are skipped.
+import hashlib
+import threading
+
+import numpy as np
+
+from simulation import MINER_FIELDS, Miner, Projection, Scenario, cumulative_yields, pack_scenarios, solve_purchases, step_yields, steps_in
+
+def input_key(*values):
+    # Canonical hash of numbers, strings, arrays, miners, scenarios and (nested) lists, tuples and dicts.
+    # Numbers are hashed as floats so 7 and 7.0 give the same key, and dicts don't depend on the order
+    # of their keys. A miner gives the same key as the dict with its fields.
+    digest = hashlib.blake2b(digest_size = 16)
+
+    def add(value):
+        if isinstance(value, Miner):
+            add({field: value[field] for field in MINER_FIELDS})
+        elif isinstance(value, Scenario):
+            digest.update(b"S")
+            add(value.values)
+        elif isinstance(value, dict):
+            digest.update(b"{")
+            for key in sorted(value, key = str):
+                add(str(key))
+                add(value[key])
+            digest.update(b"}")
+        elif isinstance(value, (list, tuple)):
+            digest.update(b"[")
+            for item in value:
+                add(item)
+            digest.update(b"]")
+        elif isinstance(value, np.ndarray) and value.ndim > 0:
+            array = np.ascontiguousarray(value, dtype = float)
+            digest.update(b"a" + repr(array.shape).encode() + array.tobytes())
+        elif isinstance(value, str):
+            digest.update(b"s" + value.encode() + b"\0")
+        elif value is None:
+            digest.update(b"n")
+        else:
+            digest.update(b"f" + repr(float(value)).encode())
+
+    add(values)
+    return digest.hexdigest()
+
+class IncrementalProjector():
+    # Projects scenarios like simulation.project, reusing the purchase events of the previous projection.
+    # `prepare` sets the main parameters (changing them throws every checkpoint away), then `project`
+    # projects a list of scenarios with them. Only constant or scheduled yields are supported
+    # (not one network power and block reward per scenario).
+    # Checkpoints can be added from other threads (like the callback threads of the process pool).
+    def __init__(self):
+        self.parameters_key = None
+        self.generation = 0 # Goes up every time the parameters change
+        self.checkpoints = {} # Scenario key -> (packed miners, segments)
+        self.previous = [] # Packed miners and segments of each scenario of the last projection, for diffing
+        self.stats = {"skipped": 0, "resumed": 0, "projected": 0} # Of the last projection
+        self.lock = threading.RLock()
+
+    def prepare(self, balance, total_power, total_bonus, network_power, block_reward, days, step = 1):
+        # Returns True when the parameters are the same as before, so the checkpoints can be used
+        with self.lock:
+            return self.set_parameters(balance, total_power, total_bonus, network_power, block_reward, days, step)
+
+    def set_parameters(self, balance, total_power, total_bonus, network_power, block_reward, days, step):
+        parameters_key = input_key(balance, total_power, total_bonus, network_power, block_reward, days, step)
+        if parameters_key == self.parameters_key:
+            return True
+
+        self.parameters_key = parameters_key
+        self.generation += 1
+        self.checkpoints = {}
+        self.previous = []
+
+        self.balance = balance
+        self.total_power = total_power
+        self.total_bonus = total_bonus
+        self.days = days
+        self.step = step
+        self.steps = steps_in(days, step)
+        self.step_yield = step_yields(network_power, block_reward, self.steps, step)
+        if np.ndim(self.step_yield) > 1:
+            raise ValueError("Incremental projections need the same network power and block reward for every scenario.")
+        self.cumulative_yield = cumulative_yields(self.step_yield)
+        return False
+
+    def add(self, start, projection, scenarios, generation = None):
+        # Keeps the purchase events of a projection that was made elsewhere (like in the process pool)
+        # as checkpoints, `projection` holds the scenarios from scenarios[start] on.
+        # Ignored when the parameters changed since `generation`.
+        packed = pack_scenarios(scenarios[start:start + len(projection)])
+        segments = (projection.segment_step, projection.segment_balance, projection.segment_power, projection.segment_bonus)
+        with self.lock:
+            if generation is not None and generation != self.generation:
+                return
+            for row in range(len(projection)):
+                self.remember(start + row, [array[row] for array in packed], [array[row] for array in segments])
+
+    def remember(self, index, miners, segments, key = None):
+        count = np.count_nonzero(np.isfinite(miners[2])) # Padding miners can't be afforded
+        miners = tuple(array[:count].copy() for array in miners)
+        segments = tuple(array[:count + 1].copy() for array in segments)
+        self.checkpoints[key or input_key(*miners)] = (miners, segments)
+        if index >= len(self.previous):
+            self.previous.extend([None] * (index + 1 - len(self.previous)))
+        self.previous[index] = (miners, segments)
+
+    def diff(self, scenarios):
+        # Compares the scenarios with the checkpoints without projecting anything, returns a dict with:
+        #   - "packed": the scenarios packed by pack_scenarios, and "keys": the key of each scenario.
+        #   - "first_miner": the first miner each scenario has to be projected from.
+        #   - "checkpoints": the checkpoint each scenario resumes from (or None).
+        #   - "stats": how many scenarios get skipped, resumed or projected from the start.
+        # It can be given to `project`, for example after checking that enough gets reused.
+        with self.lock:
+            if self.parameters_key is None:
+                raise RuntimeError("The parameters must be set with prepare first.")
+
+            hashrates, bonuses, prices = packed = pack_scenarios(scenarios)
+            miner_count = prices.shape[1]
+            first_miner = np.zeros(len(scenarios), dtype = np.int64)
+            keys = []
+            checkpoints = []
+            stats = {"skipped": 0, "resumed": 0, "projected": 0}
+            for i, scenario in enumerate(scenarios):
+                count = len(scenario)
+                miners = (hashrates[i, :count], bonuses[i, :count], prices[i, :count])
+                keys.append(input_key(*miners))
+                checkpoint = self.checkpoints.get(keys[-1])
+                if checkpoint is not None:
+                    # Same miners as a scenario that was already projected
+                    first_miner[i] = miner_count
+                    stats["skipped"] += 1
+                elif i < len(self.previous) and self.previous[i] is not None:
+                    # Same scenario as last time with some miners changed, the purchases before
+                    # the first changed miner stay the same
+                    checkpoint = self.previous[i]
+                    old_count = len(checkpoint[0][0])
+                    common = min(count, old_count)
+                    changed = np.flatnonzero(np.any([new[:common] != old[:common] for new, old in zip(miners, checkpoint[0])], axis = 0))
+                    first_miner[i] = changed[0] if len(changed) else common
+                    stats["resumed" if first_miner[i] > 0 else "projected"] += 1
+                else:
+                    stats["projected"] += 1
+                checkpoints.append(checkpoint)
+
+            return {"packed": packed, "keys": keys, "first_miner": first_miner, "checkpoints": checkpoints, "stats": stats}
+
+    def project(self, scenarios, history_interval = 1, history_dtype = "float64", diff = None):
+        # Returns a simulation.Projection of the scenarios, see `stats` for what got reused.
+        # `diff` is the result of self.diff(scenarios), it gets computed when not given.
+        with self.lock:
+            if diff is None:
+                diff = self.diff(scenarios)
+            return self.project_diff(diff, history_interval, history_dtype)
+
+    def project_diff(self, diff, history_interval, history_dtype):
+        hashrates, bonuses, prices = diff["packed"]
+        keys, first_miner = diff["keys"], diff["first_miner"]
+        scenario_count, miner_count = prices.shape
+        segment_step = np.full((scenario_count, miner_count + 1), self.steps, dtype = np.int64)
+        segment_balance = np.zeros((scenario_count, miner_count + 1))
+        segment_power = np.zeros((scenario_count, miner_count + 1))
+        segment_bonus = np.zeros((scenario_count, miner_count + 1))
+        segments = (segment_step, segment_balance, segment_power, segment_bonus)
+
+        segment_step[:, 0] = 0
+        segment_balance[:, 0] = self.balance
+        segment_power[:, 0] = self.total_power
+        segment_bonus[:, 0] = self.total_bonus / 100
+
+        self.stats = diff["stats"]
+        for i, checkpoint in enumerate(diff["checkpoints"]):
+            if checkpoint is not None:
+                length = min(first_miner[i], len(checkpoint[1][0]) - 1) + 1
+                for array, old in zip(segments, checkpoint[1]):
+                    array[i, :length] = old[:length]
+
+        solve_purchases(self.step_yield, self.cumulative_yield, self.steps, hashrates, bonuses, prices,
+                        segment_step, segment_balance, segment_power, segment_bonus, first_miner)
+
+        # Only the scenarios of the last projection are kept
+        self.checkpoints = {}
+        self.previous = []
+        for i in range(scenario_count):
+            self.remember(i, (hashrates[i], bonuses[i], prices[i]), [array[i] for array in segments], keys[i])
+
+        return Projection(self.days, self.step, self.step_yield, segment_step, segment_balance, segment_power,
+                          segment_bonus, history_interval, self.cumulative_yield, history_dtype)
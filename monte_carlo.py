@@ -0,0 +1,58 @@
+# Monte Carlo projection.
+# RLT Network Power and RLT Block Reward drift over time, so instead of projecting them as constants
+# we sample many random paths for both and look at the spread of the resulting balances.
+import numpy as np
+
+from simulation import cumulative_yields, pack_scenarios, project_packed, step_yields, steps_in
+
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+
+def sample_paths(initial, change, paths, steps, step, rng):
+    # Returns a (path x step) array of values starting at `initial`. `change` is the (mean, standard deviation)
+    # of the daily change in percent, for example (0.5, 2) for a network that grows by 0.5% a day on average.
+    # The paths are geometric random walks, so values stay positive. No change keeps the value constant.
+    # `initial` can also be a schedule (see schedules.py), the random walks then drift around it.
+    if change is None:
+        return np.ones((paths, steps)) * initial
+
+    mean, deviation = change
+    log_changes = rng.normal(np.log1p(mean / 100) * step, deviation / 100 * np.sqrt(step), size = (paths, steps))
+    # The first step uses the initial value, every following step builds on the previous one
+    log_changes[:, 0] = 0
+    return initial * np.exp(np.cumsum(log_changes, axis = 1))
+
+def monte_carlo(balance, total_power, total_bonus, network_power, block_reward, days, scenarios,
+                paths = 1000, network_growth = None, reward_change = None, step = 1,
+                percentiles = DEFAULT_PERCENTILES, seed = None):
+    # Projects every scenario along `paths` random paths of network power and block reward
+    # (see sample_paths for network_growth and reward_change) and returns a dict with:
+    #   - "times": times of the history values (the end of each day).
+    #   - "percentiles": the percentiles that were computed.
+    #   - "balance": (scenario x percentile x time) array of balances.
+    # Every scenario sees the same paths, so they can be compared with each other.
+    rng = np.random.default_rng(seed)
+    steps = steps_in(days, step)
+    network_power_paths = sample_paths(network_power, network_growth, paths, steps, step, rng)
+    block_reward_paths = sample_paths(block_reward, reward_change, paths, steps, step, rng)
+    step_yield = step_yields(network_power_paths, block_reward_paths, steps, step)
+    cumulative_yield = cumulative_yields(step_yield)
+
+    hashrates, bonuses, prices = pack_scenarios(scenarios)
+    balance_percentiles = []
+    times = None
+
+    # One scenario at a time, with one row per path, to keep memory at (path x day)
+    for index in range(len(scenarios)):
+        projection = project_packed(balance, total_power, total_bonus, step_yield, days,
+                                    np.repeat(hashrates[index:index + 1], paths, axis = 0),
+                                    np.repeat(bonuses[index:index + 1], paths, axis = 0),
+                                    np.repeat(prices[index:index + 1], paths, axis = 0),
+                                    step = step, cumulative_yield = cumulative_yield)
+        balance_percentiles.append(np.percentile(projection.history("balance"), percentiles, axis = 0))
+        times = projection.times()
+
+    return {
+        "times": times,
+        "percentiles": np.asarray(percentiles),
+        "balance": np.array(balance_percentiles)
+    }
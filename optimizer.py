@@ -0,0 +1,147 @@
+# Purchase order search.
+# Finds the order in which to buy a set of miners that gives the best projection,
+# without having to build (and simulate) one scenario per permutation.
+# Purchases follow the same rules as simulation.project with the same step and schedules, so the order
+# is the best one for a projection with those parameters (the window buys on every block, the command
+# line mode every day unless `step` is set).
+import math
+
+import numpy as np
+
+from simulation import cumulative_yields, step_yields, steps_in, yield_until
+
+OBJECTIVES = ("balance", "power", "goal")
+
+def next_purchase(start_step, balance, bonused_power, price, step_yield, cumulative_yield, steps):
+    # Returns the step the miner gets bought on when we're on `start_step` with `balance`,
+    # following the same rules as simulation.solve_purchases, or None if it never gets affordable.
+    missing = price - balance
+    if missing <= 0:
+        return start_step
+    if bonused_power <= 0:
+        return None
+    if cumulative_yield is None:
+        if step_yield <= 0:
+            return None
+        purchase_step = start_step + math.ceil(missing / (bonused_power * step_yield))
+    else:
+        start_yield = yield_until(step_yield, cumulative_yield, None, start_step)
+        purchase_step = int(np.searchsorted(cumulative_yield, start_yield + missing / bonused_power, side = "left"))
+    return purchase_step if purchase_step < steps else None
+
+def steps_to_earn(step_yield, cumulative_yield, steps, earned):
+    # Number of steps (with a fraction) after which 1 Gh/s (with bonus) has earned `earned` RLT
+    # since the start, like Projection.steps_to_earn. Returns None when it never does.
+    if earned <= 0:
+        return 0
+    if cumulative_yield is None:
+        reached = earned / step_yield if step_yield > 0 else math.inf
+        return reached if reached <= steps else None
+
+    after = int(np.searchsorted(cumulative_yield, earned, side = "left"))
+    if after > steps:
+        return None
+    start, end = cumulative_yield[after - 1], cumulative_yield[after]
+    return after - 1 + min(max((earned - start) / (end - start), 0), 1)
+
+def add_to_frontier(frontier, step, base_balance, order):
+    # Every state in a frontier owns the same miners, so it's only worth keeping if no other
+    # state got them earlier with a better base balance (balance extrapolated back to the start).
+    # The frontier is sorted by step, which means base balances are strictly increasing.
+    for other_step, other_base_balance, _ in frontier:
+        if other_step <= step and other_base_balance >= base_balance:
+            return
+
+    frontier[:] = [state for state in frontier if not (state[0] >= step and state[1] <= base_balance)]
+    frontier.append((step, base_balance, order))
+    frontier.sort()
+
+def find_best_order(balance, total_power, total_bonus, network_power, block_reward, days, miners,
+                    objective = "balance", goal = None, step = 1):
+    # Searches the best order to buy `miners` in, for one of the OBJECTIVES:
+    #   - "balance": maximizes the balance at the end of the projection.
+    #   - "power": maximizes the power (with bonus) at the end of the projection,
+    #              using the final balance to break ties.
+    #   - "goal": reaches a balance of `goal` the soonest.
+    # The parameters are the ones of simulation.project, network_power and block_reward can be schedules.
+    # Miners that aren't worth buying (or never become affordable) are left out of the order.
+    # Returns (order, value) where order is a list of indices into `miners` and value is the final
+    # balance, the final power or the time in days until the goal is reached (like Projection.time_to).
+    # Returns (None, None) when no order reaches the goal within the projection.
+
+    # The search is a dynamic programming over subsets of miners: a state is the set of miners bought
+    # so far, and for each set we only keep the states that aren't dominated (see add_to_frontier).
+    # A dominated state can't do better than the one dominating it, since the latter can make the
+    # same purchases no later and with at least as much balance.
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective ({objective}).")
+    if objective == "goal" and goal is None:
+        raise ValueError("A goal balance is required for the `goal` objective.")
+
+    steps = steps_in(days, step)
+    step_yield = step_yields(network_power, block_reward, steps, step)
+    if np.ndim(step_yield) > 1:
+        raise ValueError("The order search takes a single network power and block reward schedule.")
+    cumulative_yield = cumulative_yields(step_yield)
+    final_yield = yield_until(step_yield, cumulative_yield, None, steps)
+    miner_count = len(miners)
+
+    powers = {} # Power with bonus of each set of miners
+    def bonused_power(subset):
+        if subset not in powers:
+            power, bonus = total_power, total_bonus
+            for i in range(miner_count):
+                if subset >> i & 1:
+                    power += miners[i]["hashrate"]
+                    bonus += miners[i]["bonus"]
+            powers[subset] = power * (1 + bonus / 100)
+        return powers[subset]
+
+    best_order, best_value, best_key = None, None, None
+
+    frontiers = {0: [(0, balance, ())]}
+    for subset in sorted(range(1 << miner_count), key = lambda subset: bin(subset).count("1")):
+        if subset not in frontiers:
+            continue
+
+        power = bonused_power(subset)
+        for state_step, base_balance, order in frontiers.pop(subset):
+            start_yield = yield_until(step_yield, cumulative_yield, None, state_step)
+            state_balance = base_balance + power * start_yield
+
+            # Value of the projection if we stop buying miners here
+            if objective == "goal":
+                if state_balance >= goal:
+                    reached = state_step
+                elif power > 0:
+                    reached = steps_to_earn(step_yield, cumulative_yield, steps, start_yield + (goal - state_balance) / power)
+                else:
+                    reached = None
+                value = None if reached is None else reached * step
+                key = None if value is None else -value
+            else:
+                final_balance = base_balance + power * final_yield
+                if objective == "balance":
+                    key = value = final_balance
+                else:
+                    value = power
+                    key = (value, final_balance)
+
+            if key is not None and (best_key is None or key > best_key):
+                best_order, best_value, best_key = list(order), value, key
+
+            for i in range(miner_count):
+                if subset >> i & 1:
+                    continue
+                purchase_step = next_purchase(state_step, state_balance, power, miners[i]["price"],
+                                              step_yield, cumulative_yield, steps)
+                if purchase_step is None:
+                    continue
+
+                new_subset = subset | 1 << i
+                purchase_yield = yield_until(step_yield, cumulative_yield, None, purchase_step)
+                new_balance = state_balance + power * (purchase_yield - start_yield) - miners[i]["price"]
+                new_base_balance = new_balance - bonused_power(new_subset) * purchase_yield
+                add_to_frontier(frontiers.setdefault(new_subset, []), purchase_step, new_base_balance, order + (i,))
+
+    return best_order, best_value
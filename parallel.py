@@ -0,0 +1,62 @@
+# Parallel scenario evaluation.
+# Scenarios get split into chunks that are projected by a pool of worker processes. The pool is
+# created once and kept warm, so later projections don't pay for starting processes again.
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+import math
+import os
+
+from simulation import project
+
+executor = None
+
+def get_executor():
+    # Returns the shared process pool, starting it the first time it's needed
+    global executor
+    if executor is None:
+        # Windows can't wait on more than 61 worker processes
+        executor = ProcessPoolExecutor(max_workers = min(61, os.cpu_count() or 1))
+    return executor
+
+def shutdown_executor():
+    global executor
+    if executor is not None:
+        executor.shutdown(cancel_futures = True)
+        executor = None
+
+def project_filled(*args, fill = (), **options):
+    # simulation.project with the histories of the fields in `fill` filled in, so they're computed
+    # in the worker and sent back with the projection
+    projection = project(*args, **options)
+    for field in fill:
+        projection.history(field)
+    return projection
+
+def split_scenarios(scenarios, chunk_size = None):
+    # Returns a list of (start_index, chunk) tuples covering all scenarios.
+    # By default, every worker gets about 4 chunks so results can be streamed as they finish.
+    if chunk_size is None:
+        chunk_size = max(1, math.ceil(len(scenarios) / (4 * (os.cpu_count() or 1))))
+    return [(start, scenarios[start:start + chunk_size]) for start in range(0, len(scenarios), chunk_size)]
+
+def chunk_result(future):
+    # Projection of a finished chunk, or the exception that stopped it (CancelledError when it got cancelled)
+    if future.cancelled():
+        return CancelledError()
+    return future.exception() or future.result()
+
+def submit_projections(balance, total_power, total_bonus, network_power, block_reward, days, scenarios,
+                       on_result, chunk_size = None, pool = None, fill = (), **options):
+    # Projects the scenarios in the pool without waiting for them. `on_result` gets called with
+    # (start_index, projection) for every chunk as soon as it's done (from a background thread),
+    # or with (start_index, exception) if the chunk failed. Returns the number of chunks.
+    # The histories of the fields in `fill` come back filled in (see project_filled).
+    # `options` are passed to simulation.project (step, history_interval, history_dtype).
+    pool = pool or get_executor()
+    chunks = split_scenarios(scenarios, chunk_size)
+
+    for start, chunk in chunks:
+        future = pool.submit(project_filled, balance, total_power, total_bonus, network_power, block_reward, days, chunk,
+                             fill = fill, **options)
+        future.add_done_callback(lambda future, start = start: on_result(start, chunk_result(future)))
+
+    return len(chunks)
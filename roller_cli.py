@@ -0,0 +1,449 @@
+# Command line mode.
+# Projects scenarios read from JSON, YAML or CSV files and writes the per-day histories
+# to CSV or Parquet files, without importing tkinter, matplotlib, PIL or pyglet.
+#
+# Usage: python roller_cli.py plan1.json plan2.yaml --output results/
+#
+# JSON and YAML files hold the main parameters and the scenarios:
+#   {
+#       "balance": 12.5,                  (RLT)
+#       "power": "2.679 Ph/s",            (without bonus, a number means Gh/s)
+#       "bonus": 1.91,                    (%)
+#       "network_power": "5.3 Eh/s",
+#       "block_reward": 30,               (RLT)
+#       "days": 365,
+#       "step": 0.25,                     (optional, days between two purchase checks, 1 by default)
+#       "scenarios": [[{"hashrate": "110 Th/s", "bonus": 3, "price": 7}, ...other miners], ...other scenarios]
+#   }
+#
+# network_power and block_reward can also change over time, see schedules.parse_schedule:
+#       "network_power": {"start": "5.3 Eh/s", "growth": 0.3},
+#       "block_reward": {"start": 30, "changes": {"90": 25}},
+#       "network_power": {"csv": "history.csv", "column": "network_power"},   (relative to the input file)
+#
+# To mine several currencies at once, replace network_power and block_reward by a list of currencies
+# (see currencies.currency_arrays), the output then also has the reward and mined coins of each currency:
+#       "currencies": [{"name": "RLT", "network_power": "5.3 Eh/s", "block_reward": 30, "allocation": 60, "rate": 1},
+#                      {"name": "BTC", "network_power": "9.1 Eh/s", "block_reward": 0.0007, "allocation": 40, "rate": 41000}],
+#
+# CSV files have one miner per row with the columns scenario, hashrate, bonus and price,
+# the main parameters are then given on the command line (which also overrides the ones in files).
+#
+# With --paths, every scenario is projected along many random paths of network power and block reward
+# (Monte Carlo) and the output holds percentiles of the balance instead, --plot also draws them.
+#
+# With --sweep, parameters are varied over a grid (up to two of them to --plot it) and the output holds
+# the final balance, and the days until --goal is reached, of every scenario for every combination:
+#   --sweep network_power="4 Eh/s:6 Eh/s:20" --sweep 1.3.price=5,7,9 --goal 100
+# where 1.3.price is the price of the 3rd miner in the 1st scenario.
+#
+# Miners can also come from a catalog (see catalog.py), scenarios then list the ids of its miners:
+#       "catalog": "market.csv",          (relative to the input file)
+#       "scenarios": [["rlt-3", "rlt-3", {"hashrate": "1 Ph/s", "bonus": 0, "price": 90}], ...]
+#
+# With --optimize, the miners of every scenario are taken as a set and the output holds the order to buy
+# them in that gives the best final balance, the best final power or reaches --goal the soonest
+# (see optimizer.find_best_order), miners that aren't worth buying are left out of the order.
+#
+# With --cache, projections are kept in a directory and reused when the same inputs come again.
+import argparse
+import csv
+import json
+import os
+import sys
+
+import numpy as np
+
+from cache import ProjectionCache
+from catalog import MinerCatalog
+from currencies import CURRENCY_FIELDS, project_currencies
+from expressions import to_number
+from monte_carlo import DEFAULT_PERCENTILES, monte_carlo
+from optimizer import OBJECTIVES, find_best_order
+from schedules import parse_schedule
+from simulation import HISTORY_DTYPES, HISTORY_FIELDS, MINER_FIELDS, Miner, Scenario, parse_power, project
+from sweep import parameter_name, plot_sweep, sweep
+
+PARAMETERS = ("balance", "power", "bonus", "network_power", "block_reward", "days")
+CURRENCY_PARAMETERS = ("network_power", "block_reward", "allocation")
+OPTIONAL_PARAMETERS = {"step": 1}
+catalogs = {} # Path -> MinerCatalog, so a catalog used by several files only gets read once
+
+INPUT_FORMATS = {".json": "json", ".yaml": "yaml", ".yml": "yaml", ".csv": "csv"}
+OUTPUT_FORMATS = ("csv", "parquet")
+OBJECTIVE_COLUMNS = {"balance": "final_balance", "power": "final_power", "goal": "time_to_goal"}
+CSV_CHUNK_ROWS = 65536 # Rows turned into text at once, so big histories never all become Python floats
+
+def read_csv_scenarios(path):
+    # Groups the miner rows by scenario, keeping the order of the scenarios and of the miners
+    scenarios = {}
+    with open(path, newline = "") as file:
+        for row in csv.DictReader(file):
+            scenarios.setdefault(row["scenario"], []).append({
+                "hashrate": row["hashrate"],
+                "bonus": row["bonus"],
+                "price": row["price"]
+            })
+    return {"scenarios": list(scenarios.values())}
+
+def read_input(path):
+    input_format = INPUT_FORMATS.get(os.path.splitext(path)[1].lower())
+    if input_format is None:
+        raise ValueError(f"Unknown input format ({path}), expected one of: {', '.join(INPUT_FORMATS)}.")
+
+    if input_format == "csv":
+        return read_csv_scenarios(path)
+
+    with open(path) as file:
+        if input_format == "json":
+            return json.load(file)
+
+        try:
+            import yaml
+        except ImportError:
+            raise ImportError("Reading YAML files requires PyYAML (pip install pyyaml).")
+        return yaml.safe_load(file)
+
+def normalize_input(data, directory = ""):
+    # Checks that every field is there and converts powers to Gh/s,
+    # returns the arguments of simulation.project (or currencies.project_currencies) as a dict.
+    # Schedule CSV files are relative to `directory` (the one of the input file).
+    currencies = data.get("currencies")
+    for parameter in PARAMETERS:
+        if data.get(parameter) is None and not (currencies and parameter in CURRENCY_PARAMETERS):
+            raise ValueError(f"`{parameter}` is not set.")
+
+    catalog = None
+    if data.get("catalog"):
+        catalog = catalogs.get(data["catalog"])
+        if catalog is None:
+            catalog = catalogs[data["catalog"]] = MinerCatalog.read(data["catalog"])
+
+    scenarios = []
+    for i, scenario in enumerate(data.get("scenarios") or [[]]):
+        miners = []
+        for j, miner in enumerate(scenario):
+            if not isinstance(miner, dict) or set(miner) == {"id"}:
+                # Id of a catalog miner
+                miner_id = miner["id"] if isinstance(miner, dict) else miner
+                if catalog is None:
+                    raise ValueError(f"Miner {j + 1} in scenario {i + 1} refers to a catalog, but no `catalog` is set.")
+                if miner_id not in catalog:
+                    raise ValueError(f"Miner {j + 1} in scenario {i + 1}: there is no miner with id {miner_id} in the catalog.")
+                miners.append(catalog[miner_id])
+                continue
+
+            for field in MINER_FIELDS:
+                if miner.get(field) in (None, ""):
+                    raise ValueError(f"{field.capitalize()} of miner {j + 1} in scenario {i + 1} is not set.")
+            try:
+                miners.append(Miner(miner["hashrate"], miner["bonus"], miner["price"]))
+            except ValueError as error:
+                raise ValueError(f"Miner {j + 1} in scenario {i + 1}: {error}")
+        scenarios.append(Scenario(miners))
+
+    days = int(to_number(data["days"]))
+    step = to_number(data.get("step", OPTIONAL_PARAMETERS["step"]))
+
+    normalized = {
+        "balance": to_number(data["balance"]),
+        "total_power": parse_power(data["power"]),
+        "total_bonus": to_number(data["bonus"]),
+        "days": days,
+        "scenarios": scenarios,
+        "step": step
+    }
+
+    if currencies:
+        normalized["currencies"] = []
+        for i, currency in enumerate(currencies):
+            for parameter in CURRENCY_PARAMETERS:
+                if currency.get(parameter) is None:
+                    raise ValueError(f"`{parameter}` of currency {i + 1} is not set.")
+            normalized["currencies"].append({
+                "name": str(currency.get("name", f"Currency {i + 1}")),
+                "network_power": parse_schedule(currency["network_power"], days, step, convert = parse_power,
+                                                positive = True, directory = directory),
+                "block_reward": parse_schedule(currency["block_reward"], days, step, directory = directory),
+                "allocation": to_number(currency["allocation"]),
+                "rate": parse_schedule(currency.get("rate", 1), days, step, directory = directory)
+            })
+    else:
+        normalized["network_power"] = parse_schedule(data["network_power"], days, step, convert = parse_power,
+                                                     positive = True, directory = directory)
+        normalized["block_reward"] = parse_schedule(data["block_reward"], days, step, directory = directory)
+
+    return normalized
+
+def history_columns(projection, currency_projection = None):
+    # Long format: one row per scenario and day (days start at 1, like in the graph).
+    # Columns stay arrays, in the precision of the projection's histories.
+    times = projection.times()
+    columns = {
+        "scenario": np.repeat(np.arange(1, len(projection) + 1), len(times)),
+        "day": np.tile(times, len(projection))
+    }
+    for field in HISTORY_FIELDS:
+        columns[field] = projection.history(field).ravel()
+
+    if currency_projection is not None:
+        for field in CURRENCY_FIELDS:
+            history = currency_projection.currency_history(field).astype(projection.history_dtype, copy = False)
+            for index, name in enumerate(currency_projection.names):
+                columns[f"{name}_{field}"] = history[:, index].ravel()
+    return columns
+
+def percentile_columns(result):
+    # Long format: one row per scenario and day, with one column per percentile of the balance
+    times = result["times"].tolist()
+    scenario_count = len(result["balance"])
+    columns = {
+        "scenario": [scenario + 1 for scenario in range(scenario_count) for _ in times],
+        "day": times * scenario_count
+    }
+    for index, percentile in enumerate(result["percentiles"]):
+        columns[f"balance_p{percentile:g}"] = result["balance"][:, index].ravel().tolist()
+    return columns
+
+def plot_percentiles(result, path):
+    # Draws the middle percentile of each scenario as a line, and the other percentiles as bands around it
+    import matplotlib
+    matplotlib.use("Agg") # No window
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize = (12, 7))
+    ax.set_title("RLT Prediction Over Time (Monte Carlo)")
+    ax.set_ylabel("--- RLT -->")
+    ax.set_xlabel("--- Days -->")
+
+    cm = plt.get_cmap("gist_rainbow")
+    percentile_count = len(result["percentiles"])
+    for scenario, balance in enumerate(result["balance"]):
+        color = cm(scenario / len(result["balance"]))
+        for low in range(percentile_count // 2):
+            ax.fill_between(result["times"], balance[low], balance[percentile_count - 1 - low], color = color, alpha = 0.15)
+        ax.plot(result["times"], balance[percentile_count // 2], color = color, label = f"Scenario {scenario + 1}")
+
+    ax.legend(loc = "upper left")
+    fig.savefig(path)
+    plt.close(fig)
+
+def sweep_columns(result):
+    # Long format: one row per combination and scenario, with one column per swept parameter
+    grid = [values.ravel().tolist() for values in np.meshgrid(*result["values"], indexing = "ij")]
+    scenario_count = result["final_balance"].shape[-1]
+    columns = {parameter_name(parameter): [value for value in values for _ in range(scenario_count)]
+               for parameter, values in zip(result["parameters"], grid)}
+    columns["scenario"] = list(range(1, scenario_count + 1)) * len(grid[0])
+    columns["final_balance"] = result["final_balance"].ravel().tolist()
+    if "time_to_goal" in result:
+        columns["time_to_goal"] = result["time_to_goal"].ravel().tolist()
+    return columns
+
+def optimize(arguments, objective, goal = None):
+    # One row per scenario, with the best order to buy its miners in (miner numbers starting at 1)
+    # and the value it gets for the objective (empty when the goal is never reached)
+    columns = {"scenario": [], "order": [], OBJECTIVE_COLUMNS[objective]: []}
+    parameters = {name: value for name, value in arguments.items() if name != "scenarios"}
+    for index, scenario in enumerate(arguments["scenarios"]):
+        order, value = find_best_order(**parameters, miners = list(scenario), objective = objective, goal = goal)
+        columns["scenario"].append(index + 1)
+        columns["order"].append(" ".join(str(miner + 1) for miner in order) if order is not None else "")
+        columns[OBJECTIVE_COLUMNS[objective]].append(value)
+    return columns
+
+def write_output(columns, path, output_format):
+    if output_format == "parquet":
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError("Writing Parquet files requires pyarrow (pip install pyarrow).")
+        pyarrow.parquet.write_table(pyarrow.table(columns), path)
+        return
+
+    with open(path, "w", newline = "") as file:
+        writer = csv.writer(file)
+        writer.writerow(columns.keys())
+        values = list(columns.values())
+        for start in range(0, len(values[0]) if values else 0, CSV_CHUNK_ROWS):
+            chunk = [np.asarray(column[start:start + CSV_CHUNK_ROWS]) for column in values]
+            # Shortest text of float32 values, otherwise they'd get written with float64 digits
+            writer.writerows(zip(*[column.astype(str).tolist() if column.dtype == np.float32 else column.tolist()
+                                   for column in chunk]))
+
+def output_names(input_paths):
+    # Name of the output of every input: the file name without its extension, or when several inputs
+    # share it, their path from the directory they have in common with the extension, so
+    # a/plan.json and b/plan.json give a_plan_json and b_plan_json. Raises a ValueError if names still clash.
+    stems = {}
+    for path in input_paths:
+        stems.setdefault(os.path.splitext(os.path.basename(path))[0], set()).add(os.path.abspath(path))
+
+    names = {}
+    for path in input_paths:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        same_stem = stems[stem]
+        if len(same_stem) == 1:
+            names[path] = stem
+            continue
+        common = os.path.commonpath([os.path.dirname(other) for other in same_stem])
+        relative, extension = os.path.splitext(os.path.relpath(os.path.abspath(path), common))
+        names[path] = "_".join(relative.split(os.sep) + [extension.lstrip(".")])
+
+    inputs_of_name = {}
+    for path, name in names.items():
+        inputs_of_name.setdefault(name, set()).add(os.path.abspath(path))
+    for name, paths in inputs_of_name.items():
+        if len(paths) > 1:
+            raise ValueError(f"The outputs of {', '.join(sorted(paths))} would all be named {name}, rename one of them.")
+    return names
+
+def run(input_path, output_dir, output_format, overrides, monte_carlo_options = None, plot = False, sweep_options = None,
+        cache = None, history_dtype = "float64", optimize_options = None, name = None):
+    # `name` is the one of the output files, the input's file name without its extension by default
+    data = read_input(input_path)
+    data.update(overrides)
+    if data.get("catalog"):
+        data["catalog"] = os.path.join(os.path.dirname(input_path), data["catalog"])
+    if name is None:
+        name = os.path.splitext(os.path.basename(input_path))[0]
+    output_path = os.path.join(output_dir, f"{name}.{output_format}")
+
+    arguments = normalize_input(data, os.path.dirname(input_path))
+    if optimize_options:
+        if "currencies" in arguments or monte_carlo_options or sweep_options:
+            raise ValueError("The order search doesn't support several currencies, Monte Carlo projections or sweeps yet.")
+        write_output(optimize(arguments, **optimize_options), output_path, output_format)
+        return output_path
+
+    if sweep_options:
+        if "currencies" in arguments or monte_carlo_options:
+            raise ValueError("Sweeps don't support several currencies or Monte Carlo projections yet.")
+        result = sweep(**arguments, **sweep_options)
+        write_output(sweep_columns(result), output_path, output_format)
+        if plot:
+            plot_sweep(result, os.path.join(output_dir, f"{name}.png"))
+        return output_path
+
+    if monte_carlo_options:
+        if "currencies" in arguments:
+            raise ValueError("Monte Carlo projections don't support several currencies yet.")
+        result = monte_carlo(**arguments, **monte_carlo_options)
+        write_output(percentile_columns(result), output_path, output_format)
+        if plot:
+            plot_percentiles(result, os.path.join(output_dir, f"{name}.png"))
+        return output_path
+
+    if "currencies" in arguments:
+        currency_projection = project_currencies(**arguments, history_dtype = history_dtype)
+        columns = history_columns(currency_projection.projection, currency_projection)
+    elif cache is not None:
+        key = cache.key(**arguments, history_dtype = history_dtype)
+        projection = cache.get(key)
+        if projection is None:
+            projection = project(**arguments, history_dtype = history_dtype)
+            projection.histories() # Cache them filled in
+            cache.put(key, projection)
+        columns = history_columns(projection)
+    else:
+        columns = history_columns(project(**arguments, history_dtype = history_dtype))
+    write_output(columns, output_path, output_format)
+    return output_path
+
+def parse_change(value):
+    # "0.5,2" -> (0.5, 2.0)
+    mean, deviation = value.split(",")
+    return float(mean), float(deviation)
+
+def parse_sweep(value):
+    # "network_power=4 Eh/s:6 Eh/s:20" -> ("network_power", 20 values from 4e9 to 6e9 Gh/s)
+    # "1.3.price=5,7,9" -> (("price", 0, 2), [5.0, 7.0, 9.0])
+    parameter, _, values = value.partition("=")
+    parameter = {"power": "total_power", "bonus": "total_bonus"}.get(parameter.strip(), parameter.strip())
+    if parameter.count(".") == 2:
+        scenario, miner, field = parameter.split(".")
+        if field not in MINER_FIELDS:
+            raise argparse.ArgumentTypeError(f"Unknown miner field ({field}).")
+        parameter = (field, int(scenario) - 1, int(miner) - 1)
+        convert = parse_power if field == "hashrate" else to_number
+    else:
+        convert = parse_power if parameter in ("total_power", "network_power") else to_number
+
+    if ":" in values:
+        start, stop, count = values.split(":")
+        return parameter, np.linspace(convert(start), convert(stop), int(count))
+    return parameter, [convert(value) for value in values.split(",")]
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Project Rollercoin scenarios without opening the GUI.")
+    parser.add_argument("inputs", nargs = "+", help = "JSON, YAML or CSV scenario files")
+    parser.add_argument("-o", "--output", default = ".", help = "directory the histories are written to (default: current directory)")
+    parser.add_argument("-f", "--format", choices = OUTPUT_FORMATS, default = "csv", help = "output format (default: csv)")
+    for parameter in PARAMETERS + tuple(OPTIONAL_PARAMETERS):
+        parser.add_argument(f"--{parameter.replace('_', '-')}", dest = parameter, help = f"overrides `{parameter}` in every input file")
+
+    monte_carlo_group = parser.add_argument_group("Monte Carlo")
+    monte_carlo_group.add_argument("--paths", type = int, help = "number of random paths to project every scenario along")
+    monte_carlo_group.add_argument("--network-growth", type = parse_change, metavar = "MEAN,DEVIATION",
+                                   help = "daily change of the network power in percent (default: constant)")
+    monte_carlo_group.add_argument("--reward-change", type = parse_change, metavar = "MEAN,DEVIATION",
+                                   help = "daily change of the block reward in percent (default: constant)")
+    monte_carlo_group.add_argument("--percentiles", type = lambda value: [float(p) for p in value.split(",")],
+                                   default = DEFAULT_PERCENTILES, help = "balance percentiles to output (default: 5,25,50,75,95)")
+    monte_carlo_group.add_argument("--seed", type = int, help = "seed of the random paths")
+
+    sweep_group = parser.add_argument_group("Sweep")
+    sweep_group.add_argument("--sweep", type = parse_sweep, action = "append", metavar = "PARAMETER=START:STOP:COUNT",
+                             help = "parameter to vary over a grid (a global parameter or SCENARIO.MINER.FIELD, values can also be listed with commas)")
+    sweep_group.add_argument("--goal", type = float, help = "balance to reach, outputs the days it takes for every combination (also used by --optimize goal)")
+    parser.add_argument("--optimize", choices = OBJECTIVES,
+                        help = "output the order to buy the miners of each scenario in for the best final balance, final power or to reach --goal the soonest")
+    parser.add_argument("--precision", choices = HISTORY_DTYPES, default = "float64",
+                        help = "precision of the histories, float32 halves their memory and size (default: float64)")
+    parser.add_argument("--cache", metavar = "DIRECTORY", help = "keep projections in a directory and reuse them when the same inputs come again")
+    parser.add_argument("--plot", action = "store_true", help = "also draw the Monte Carlo percentiles or the sweep to a PNG file (requires matplotlib)")
+    args = parser.parse_args(argv)
+
+    monte_carlo_options = None
+    if args.paths:
+        monte_carlo_options = {
+            "paths": args.paths,
+            "network_growth": args.network_growth,
+            "reward_change": args.reward_change,
+            "percentiles": args.percentiles,
+            "seed": args.seed
+        }
+
+    sweep_options = {"axes": args.sweep, "goal": args.goal} if args.sweep else None
+    optimize_options = {"objective": args.optimize, "goal": args.goal} if args.optimize else None
+    if args.optimize == "goal" and args.goal is None:
+        parser.error("--optimize goal requires --goal")
+    cache = ProjectionCache(directory = args.cache) if args.cache else None
+
+    overrides = {parameter: getattr(args, parameter) for parameter in PARAMETERS + tuple(OPTIONAL_PARAMETERS)
+                 if getattr(args, parameter) is not None}
+    try:
+        names = output_names(args.inputs)
+    except ValueError as error:
+        parser.error(str(error))
+    os.makedirs(args.output, exist_ok = True)
+
+    # Keep going when a file fails, so one bad file doesn't stop a whole batch
+    failed = False
+    for input_path in args.inputs:
+        try:
+            output_path = run(input_path, args.output, args.format, overrides, monte_carlo_options, args.plot, sweep_options, cache, args.precision,
+                              optimize_options, names[input_path])
+            print(f"{input_path} -> {output_path}")
+        except Exception as error:
+            print(f"{input_path}: {error}", file = sys.stderr)
+            failed = True
+
+    if cache is not None:
+        stats = cache.stats()
+        print(f"Cache: {stats['hits']} hits, {stats['misses']} misses")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
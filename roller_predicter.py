@@ -1,25 +1,64 @@
-import matplotlib.pyplot as plt
+from time import sleep, perf_counter
+startup_checkpoints = [("start", perf_counter())] # [(step, time when it ended), ...], printed with --startup-times
+
 from PIL import ImageTk, Image
 from datetime import datetime
-from time import sleep
 import multiprocessing
 import tkinter as tk
-import mplcursors
-import pyglet
+from tkinter import filedialog
+import traceback
+import queue
 import ctypes
+import sys
+startup_checkpoints.append(("gui libraries", perf_counter()))
+
+from simulation import power_units, convert_power_to_gh, format_power, join_projections, Miner, Scenario, BLOCKS_PER_DAY
+from parallel import split_scenarios, submit_projections, shutdown_executor
+from incremental import IncrementalProjector
+from cache import ProjectionCache
+from expressions import evaluate, ExpressionError
+from workspace import save_workspace, load_workspace, catalog_miner
+from catalog import MinerCatalog
+startup_checkpoints.append(("simulation modules", perf_counter()))
+
+# Matplotlib and mplcursors only get imported by load_plotting, in the graph worker.
+# Neither the window nor the processes that project scenarios need them.
+plt = None
+mplcursors = None
 
-# Configure Matplotlib
 mpl_background_color = "#181928"
 mpl_text_color = "white"
 
-plt.rcParams['axes.facecolor'] = mpl_background_color
-plt.rcParams['figure.facecolor'] = mpl_background_color
+def load_plotting():
+    # Imports and configures the plotting stack, returns how long it took
+    global plt, mplcursors
+    if plt is not None:
+        return 0
+    start = perf_counter()
+
+    import matplotlib.pyplot as plt
+    import mplcursors
+
+    # Configure Matplotlib
+    plt.rcParams['axes.facecolor'] = mpl_background_color
+    plt.rcParams['figure.facecolor'] = mpl_background_color
 
-plt.rcParams['text.color'] = mpl_text_color
-plt.rcParams['axes.labelcolor'] = mpl_text_color
-plt.rcParams['xtick.color'] = mpl_text_color
-plt.rcParams['ytick.color'] = mpl_text_color
-plt.rcParams['axes.edgecolor'] = mpl_text_color
+    plt.rcParams['text.color'] = mpl_text_color
+    plt.rcParams['axes.labelcolor'] = mpl_text_color
+    plt.rcParams['xtick.color'] = mpl_text_color
+    plt.rcParams['ytick.color'] = mpl_text_color
+    plt.rcParams['axes.edgecolor'] = mpl_text_color
+
+    return perf_counter() - start
+
+def report_startup_times():
+    # Prints how long each step of the startup took, when started with --startup-times
+    if "--startup-times" not in sys.argv:
+        return
+    print("Startup times:")
+    for (_, previous), (step, end) in zip(startup_checkpoints, startup_checkpoints[1:]):
+        print(f"  {step:<20}{(end - previous) * 1000:8.1f} ms")
+    print(f"  {'total':<20}{(startup_checkpoints[-1][1] - startup_checkpoints[0][1]) * 1000:8.1f} ms")
 
 # Initialize some stuff that child processes won't need
 # Colors
@@ -39,12 +78,17 @@ miner_frame_hover_color = "#2d2e3a"
 miner_frame_selection_color = "#014344"
 
 # Constants
-power_units = ["Gh/s", "Th/s", "Ph/s", "Eh/s"]
+projection_step = 1 / BLOCKS_PER_DAY # Days, miners get bought as soon as a block makes them affordable
+min_separator_width = 4 # px, scenarios share a single separator when theirs would be thinner
 
-pyglet.font.add_file("assets/Fonts/PixelOperatorSC.ttf")
 roller_font_name = "Pixel Operator SC"
 
 if __name__ == "__main__":
+    # Only the window needs the font, child processes don't load pyglet
+    import pyglet
+    pyglet.font.add_file("assets/Fonts/PixelOperatorSC.ttf")
+    startup_checkpoints.append(("font", perf_counter()))
+
     window = tk.Tk()
 
     window_width, window_height = 600, 850
@@ -69,11 +113,17 @@ if __name__ == "__main__":
         event.widget.focus_set()
             
     window.bind_all("<Button-1>", focus_event)
+    startup_checkpoints.append(("window", perf_counter()))
 
 else:
     window = None # So that child processes don't throw NameErrors (not defined)
 
 
+# Part of a widget's size between its top left corner and the point placed with each anchor
+anchor_shifts = {"nw": (0, 0), "n": (0.5, 0), "ne": (1, 0),
+                 "w": (0, 0.5), "center": (0.5, 0.5), "e": (1, 0.5),
+                 "sw": (0, 1), "s": (0.5, 1), "se": (1, 1)}
+
 # Tkinter Classes
 class ScrollableFrame(tk.Frame):
     def __init__(self, master, root, width, height, scrollbar_color = miners_container_frame_scrollbar_color,
@@ -102,7 +152,7 @@ class ScrollableFrame(tk.Frame):
             self.outer_frame = tk.Frame(master, width = width, height = height, *args, **kwargs)
         
         self.outer_frame.propagate(0)
-        master.update()
+        master.update_idletasks()
 
         self.outer_frame.bind_all("<MouseWheel>", self.on_mousewheel, add = "+")
 
@@ -133,6 +183,15 @@ class ScrollableFrame(tk.Frame):
         self.scrollable = False
         self.scrolling = False
 
+        # Cached geometry, scrolling only moves these and redraw places the widgets once idle
+        self.outer_height = height
+        self.inner_height = 0
+        self.inner_y = 0
+        self.scrollbar_height = height
+        self.scrollbar_y = 0
+        self.drawn_scrollbar_y = 0 # Where the scrollbar really is until the next redraw
+        self.redraw_pending = False
+
     def set_scrollbar_percentage(self, scrollbar_percentage):
         if not self.scrollable:
             return
@@ -142,12 +201,10 @@ class ScrollableFrame(tk.Frame):
     def update_scrollbar_height(self):
         # Updates the height of the scrollbar depending on the size of the
         # inner frame when compared with the outer frame
-        self.master.update()
+        outer_width = self.outer_height
+        inner_width = self.inner_height
 
-        outer_width = self.outer_frame.winfo_height()
-        inner_width = super().winfo_height()
-
-        new_height_ratio = outer_width / inner_width
+        new_height_ratio = outer_width / inner_width if inner_width else 1
         if new_height_ratio >= 1:
             self.scrollable = False
 
@@ -164,10 +221,10 @@ class ScrollableFrame(tk.Frame):
             self.scrollbar.place(anchor = tk.NE, relx = 1, rely = 0)
             self.scrollbar_hidden = False
 
-        new_height = new_height_ratio * outer_width
+        self.scrollbar_height = new_height_ratio * outer_width
 
         # Set scrollbar's height
-        self.scrollbar.configure(height = new_height)
+        self.scrollbar.configure(height = self.scrollbar_height)
 
     def manual_height_update(self, reset_y = False):
         empty_label = tk.Frame(self, width=1, height=1, borderwidth=0, highlightthickness=0)
@@ -175,6 +232,7 @@ class ScrollableFrame(tk.Frame):
         # Call grid on empty_label to update height of its parent frame (self)
         empty_label.grid(row = 1000, column = 1000)
         self.master.update_idletasks()
+        self.inner_height = super().winfo_reqheight()
 
         # Destroy label
         empty_label.destroy()
@@ -208,80 +266,76 @@ class ScrollableFrame(tk.Frame):
         if not self.scrollable:
             return
 
-        temp = event.widget
-        while temp != self.root:
-            if temp == self.outer_frame:
-                break
-            temp = temp.master
-        else:
-            # temp was never equal to self.outer_frame, which means
-            # event.widget is not a child (or grandgrand...child) of self.outer_frame
+        if not self.contains(event.widget):
             return
         
         # Move inner_frame vertically
-        current_y = super().winfo_y()
-        new_y = current_y + self.scroll_jump_size * (event.delta / abs(event.delta))
-
-        outer_frame = self.outer_frame.winfo_height()
-        inner_height = super().winfo_height()
+        new_y = self.inner_y + self.scroll_jump_size * (event.delta / abs(event.delta))
 
         max_value = 0
-        min_value = outer_frame - inner_height
+        min_value = self.outer_height - self.inner_height
 
         if new_y < min_value: new_y = min_value
         if new_y > max_value: new_y = max_value
 
-        super().place(anchor = tk.NW, relx = 0, y = new_y)
-        scroll_percentage = new_y / (outer_frame - inner_height)
+        self.inner_y = new_y
+        scroll_percentage = new_y / (self.outer_height - self.inner_height)
         self.update_scrollbar_position(scroll_percentage)
 
+    def contains(self, widget):
+        # Whether widget is self.outer_frame or a child (or grandgrand...child) of it
+        while widget != self.root:
+            if widget == self.outer_frame:
+                return True
+            widget = widget.master
+        return False
+
     def on_root_motion(self, event):
         # For some reason, event.y if `y of mouse` - `y of scrollbar` (Top of scrollbar)
         # In other words, event.y is the y coordinate of the mouse inside the scrollbar
         # even though this event is binded to self.root :/
-        
-        current_y = self.scrollbar.winfo_y()
-        new_y = current_y + (event.y - self.starting_y)
-
-        outer_frame = self.outer_frame.winfo_height()
-        scrollbar_height = self.scrollbar.winfo_height()
+        # That's relative to where the scrollbar is drawn, which may not be self.scrollbar_y yet
+        new_y = self.drawn_scrollbar_y + (event.y - self.starting_y)
 
         min_value = 0
-        max_value = outer_frame - scrollbar_height
+        max_value = self.outer_height - self.scrollbar_height
 
         if new_y < min_value: new_y = min_value
         if new_y > max_value: new_y = max_value
 
-        self.scrollbar.place(anchor = tk.NE, relx = 1, y = new_y)
-        scroll_percentage = new_y / (outer_frame - scrollbar_height)
+        scroll_percentage = new_y / max_value
+        self.update_scrollbar_position(scroll_percentage)
         self.update_inner_frame_position(scroll_percentage)
 
     def update_inner_frame_position(self, scroll_percentage = None):
-        self.outer_frame.update()
+        if scroll_percentage is None:
+            scroll_percentage = self.scrollbar_y / (self.outer_height - self.scrollbar_height)
 
-        outer_height = self.outer_frame.winfo_height()
-        inner_height = super().winfo_height()
+        self.inner_y = scroll_percentage * (self.outer_height - self.inner_height)
+        self.schedule_redraw()
 
+    def update_scrollbar_position(self, scroll_percentage = None):
         if scroll_percentage is None:
-            scrollbar_y = self.scrollbar.winfo_y()
-            scrollbar_height = self.scrollbar.winfo_height()
-            scroll_percentage = scrollbar_y / (outer_height - scrollbar_height)
+            scroll_percentage = self.inner_y / (self.outer_height - self.inner_height)
 
-        new_y = scroll_percentage * (outer_height - inner_height)
-        super().place(anchor = tk.NW, x = 0, y = new_y)
+        self.scrollbar_y = scroll_percentage * (self.outer_height - self.scrollbar_height)
+        self.schedule_redraw()
 
-    def update_scrollbar_position(self, scroll_percentage = None):
-        self.outer_frame.update()
-        outer_height = self.outer_frame.winfo_height()
-        scrollbar_height = self.scrollbar.winfo_height()
+    def schedule_redraw(self):
+        # Every scroll until the window is idle gets drawn at once
+        if not self.redraw_pending:
+            self.redraw_pending = True
+            self.after_idle(self.redraw)
 
-        if scroll_percentage is None:
-            inner_y = super().winfo_y()
-            inner_height = super().winfo_height()
-            scroll_percentage = inner_y / (outer_height - inner_height)
+    def redraw(self):
+        self.redraw_pending = False
+        super().place(anchor = tk.NW, x = 0, y = self.inner_y)
+        self.draw_scrollbar()
 
-        new_y = scroll_percentage * (outer_height - scrollbar_height)
-        self.scrollbar.place(anchor = tk.NE, relx = 1, y = new_y)
+    def draw_scrollbar(self):
+        if not self.scrollbar_hidden:
+            self.scrollbar.place(anchor = tk.NE, relx = 1, y = self.scrollbar_y)
+            self.drawn_scrollbar_y = self.scrollbar_y
 
     def winfo_width(self):
         return self.outer_frame.cget("width")
@@ -305,6 +359,144 @@ class ScrollableFrame(tk.Frame):
         else:
             self.outer_frame.place(*args, **kwargs)
 
+class VirtualScrollableFrame(ScrollableFrame):
+    # ScrollableFrame for long lists of rows that all have the same height. Only the rows that fit
+    # get widgets, and scrolling rebinds these widgets to other rows instead of moving all of them,
+    # so scrolling and refreshing take the same time with 10 rows or 5000.
+    # create_row(row) returns a widget gridded in the given row, bind_row(widget, index) shows
+    # row `index` in it and save_row(widget, index) saves its values before it gets rebound.
+    def __init__(self, master, root, width, height, create_row, bind_row, save_row,
+                 min_scrollbar_height = 20, *args, **kwargs):
+        super().__init__(master, root, width, height, *args, **kwargs)
+        self.create_row = create_row
+        self.bind_row = bind_row
+        self.save_row = save_row
+        self.min_scrollbar_height = min_scrollbar_height
+
+        self.rows = [] # Row widgets, from top to bottom
+        self.row_indices = [] # Index of the row each widget shows, None if it's hidden
+        self.row_height = None # Measured on the first row widget
+        self.row_count = 0
+        self.offset = 0 # Scrolled pixels
+
+    def create_rows(self):
+        # Creates a row to measure it, then enough rows to fill the frame, plus one
+        # for the row that's half hidden while scrolling
+        self.rows = [self.create_row(0)]
+        self.update_idletasks()
+        self.row_height = max(self.rows[0].winfo_reqheight(), 1)
+
+        row_count = -(-self.outer_height // self.row_height) + 1
+        self.rows += [self.create_row(row) for row in range(1, row_count)]
+        self.row_indices = [None] * row_count
+
+    def max_offset(self):
+        if self.row_height is None:
+            return 0
+        return max(self.row_count * self.row_height - self.outer_height, 0)
+
+    def set_row_count(self, row_count, reset_y = False):
+        # Shows the rows again after they changed, without saving the values of the row widgets first
+        self.row_count = row_count
+        if self.row_height is None and row_count:
+            self.create_rows()
+
+        self.offset = 0 if reset_y else min(self.offset, self.max_offset())
+        self.scrollable = self.max_offset() > 0
+        self.update_scrollbar_height()
+        self.show_rows(save = False)
+
+    def show_rows(self, save = True):
+        # Binds the row widgets to the rows at self.offset
+        if self.row_height is None:
+            return
+        first_index = int(self.offset // self.row_height)
+        indices = [index if index < self.row_count else None
+                   for index in range(first_index, first_index + len(self.rows))]
+
+        # Save every row before binding any, a row can move to another widget
+        if save:
+            for row, old_index, index in zip(self.rows, self.row_indices, indices):
+                if old_index is not None and old_index != index:
+                    self.save_row(row, old_index)
+
+        for row, old_index, index in zip(self.rows, self.row_indices, indices):
+            if save and old_index == index:
+                continue
+            if index is None:
+                row.grid_remove()
+            else:
+                self.bind_row(row, index)
+                row.grid()
+        self.row_indices = indices
+
+        tk.Frame.place(self, anchor = tk.NW, x = 0, y = -(self.offset % self.row_height))
+
+    def see(self, index):
+        # Scrolls just enough for row `index` to be fully visible
+        if self.row_height is None:
+            return
+        top = index * self.row_height
+        if top < self.offset:
+            self.offset = top
+        elif top + self.row_height > self.offset + self.outer_height:
+            self.offset = min(top + self.row_height - self.outer_height, self.max_offset())
+        else:
+            return
+        self.show_rows()
+        self.update_scrollbar_position()
+
+    def row_widget(self, index):
+        # Widget showing row `index`, None if it's scrolled out of view
+        if index in self.row_indices:
+            return self.rows[self.row_indices.index(index)]
+        return None
+
+    def index_of(self, row):
+        return self.row_indices[self.rows.index(row)]
+
+    def manual_height_update(self, reset_y = False):
+        self.set_row_count(self.row_count, reset_y)
+
+    def update_scrollbar_height(self):
+        if not self.scrollable:
+            if not self.scrollbar_hidden:
+                self.scrollbar.place_forget()
+                self.scrollbar_hidden = True
+            return
+
+        total_height = self.row_count * self.row_height
+        self.scrollbar_height = max(self.outer_height * self.outer_height / total_height, self.min_scrollbar_height)
+        self.scrollbar.configure(height = self.scrollbar_height)
+        self.scrollbar_hidden = False
+        self.update_scrollbar_position()
+
+    def on_mousewheel(self, event):
+        if not self.scrollable or not self.contains(event.widget):
+            return
+
+        new_offset = self.offset - self.scroll_jump_size * (event.delta / abs(event.delta))
+        self.offset = min(max(new_offset, 0), self.max_offset())
+        self.update_scrollbar_position()
+
+    def update_inner_frame_position(self, scroll_percentage = None):
+        if scroll_percentage is None:
+            scroll_percentage = self.scrollbar_y / (self.outer_height - self.scrollbar_height)
+        self.offset = scroll_percentage * self.max_offset()
+        self.schedule_redraw()
+
+    def update_scrollbar_position(self, scroll_percentage = None):
+        if scroll_percentage is None:
+            scroll_percentage = self.offset / self.max_offset() if self.max_offset() else 0
+        self.scrollbar_y = scroll_percentage * (self.outer_height - self.scrollbar_height)
+        self.schedule_redraw()
+
+    def redraw(self):
+        # Rows only get rebound once per redraw, however many times the wheel turned
+        self.redraw_pending = False
+        self.show_rows()
+        self.draw_scrollbar()
+
 class SelectableFrame(tk.Frame):
     def __init__(self, parent, hover_color, selection_color = None, click_handler = None, root = window, *args, **kwargs):
         if "bg" not in kwargs and "background" not in kwargs:
@@ -369,11 +561,22 @@ class ImageButton():
     def __init__(self, master, button_img_path, hover_img_path, click_img_path, on_click, new_width=None, new_height=None, disabled=False):
         self.master = master
 
-        self.button_img = ImageTk.PhotoImage(self.resize_with_aspect_ratio(Image.open(button_img_path), new_width, new_height))
-        self.hover_img = ImageTk.PhotoImage(self.resize_with_aspect_ratio(Image.open(hover_img_path), new_width, new_height))
-        self.click_img = ImageTk.PhotoImage(self.resize_with_aspect_ratio(Image.open(click_img_path), new_width, new_height))
+        # Only the image shown first gets decoded now, the others when they're shown for the first time
+        self.image_paths = {"button": button_img_path, "hover": hover_img_path, "click": click_img_path}
+        self.new_width = new_width
+        self.new_height = new_height
+        self.images = {}
+        self.shown_img = self.image("click" if disabled else "button")
+
+        self.label = tk.Label(master, image = self.shown_img, borderwidth=0)
+
+        # For Animations
+        self.label.bind("<ButtonPress-1>", self.on_mouse_down)
+        self.label.bind("<ButtonRelease-1>", self.on_mouse_up)
+        self.label.bind("<Enter>", self.on_enter)
+        self.label.bind("<Leave>", self.on_leave)
 
-        self.label = tk.Label(master, image = self.button_img, borderwidth=0)
+        self.position = None # Top left corner, known when placed with x and y
         self.on_click = on_click
         self.mouse_hovered = False
         self.disabled = disabled
@@ -381,27 +584,31 @@ class ImageButton():
         if self.disabled:
             self.disable()
 
-        # For Animations
-        self.label.bind("<ButtonPress-1>", self.on_mouse_down)
-        self.label.bind("<ButtonRelease-1>", self.on_mouse_up)
-        self.label.bind("<Enter>", self.on_enter)
-        self.label.bind("<Leave>", self.on_leave)
+    def image(self, state):
+        # PhotoImage of a state ("button", "hover" or "click"), decoded and resized once
+        if state not in self.images:
+            image = self.resize_with_aspect_ratio(Image.open(self.image_paths[state]), self.new_width, self.new_height)
+            self.images[state] = ImageTk.PhotoImage(image)
+        return self.images[state]
 
+    # The size is the size of the image, so the geometry is known without waiting for the window to draw it
     def winfo_x(self):
-        self.master.update()
-        return self.label.winfo_x()
+        if self.position is None:
+            self.master.update_idletasks()
+            return self.label.winfo_x()
+        return self.position[0]
 
     def winfo_y(self):
-        self.master.update()
-        return self.label.winfo_y()
+        if self.position is None:
+            self.master.update_idletasks()
+            return self.label.winfo_y()
+        return self.position[1]
     
     def winfo_width(self):
-        self.master.update()
-        return self.label.winfo_width()
+        return self.shown_img.width()
     
     def winfo_height(self):
-        self.master.update()
-        return self.label.winfo_height()
+        return self.shown_img.height()
 
     def resize_with_aspect_ratio(self, image, new_width, new_height):
         width, height = image.size
@@ -420,23 +627,29 @@ class ImageButton():
 
     def disable(self):
         self.disabled = True
-        self.update_image(self.click_img)
+        self.update_image(self.image("click"))
     
     def enable(self):
         self.disabled = False
-        self.update_image(self.button_img)
+        self.update_image(self.image("button"))
+
+    def set_disabled(self, disabled):
+        # Only touches the image when the state changes, so a hovered button stays hovered
+        if disabled != self.disabled:
+            self.disable() if disabled else self.enable()
 
     def update_image(self, new_img):
         self.label.configure(image = new_img)
         self.label.image = new_img
+        self.shown_img = new_img
     
     def on_mouse_down(self, *args):
         if self.disabled: return
-        self.update_image(self.click_img)
+        self.update_image(self.image("click"))
     
     def on_mouse_up(self, *args):
         if self.disabled: return
-        self.update_image(self.hover_img)
+        self.update_image(self.image("hover"))
         if self.mouse_hovered == True:
             self.on_click()
 
@@ -445,18 +658,26 @@ class ImageButton():
             self.master.config(cursor="X_cursor")
             return
         self.mouse_hovered = True
-        self.update_image(self.hover_img)
+        self.update_image(self.image("hover"))
         self.master.config(cursor="hand2")
     
     def on_leave(self, *args):
         self.master.config(cursor="arrow")
         if self.disabled: return
         self.mouse_hovered = False
-        self.update_image(self.button_img)
+        self.update_image(self.image("button"))
     
     def place(self, *args, **kwargs):
         self.label.place(*args, **kwargs)
 
+        # Remember the top left corner, like place does with the anchor
+        if "x" in kwargs and "y" in kwargs and not args and "relx" not in kwargs and "rely" not in kwargs:
+            shift_x, shift_y = anchor_shifts[kwargs.get("anchor", tk.NW)]
+            self.position = (round(kwargs["x"]) - int(self.winfo_width() * shift_x),
+                             round(kwargs["y"]) - int(self.winfo_height() * shift_y))
+        else:
+            self.position = None
+
 class Dropdown():
     def __init__(self, master, dropdown_items, font, font_size,
                  font_color, item_font_color, background_color, border_size,
@@ -696,20 +917,21 @@ class DropdownEntry():
     def insert(self, *args, **kwargs):
         return self.entry.insert(*args, **kwargs)
 
+    # Only lay out pending geometry, without handling events like update() does
     def winfo_width(self):
-        self.frame.master.update()
+        self.frame.master.update_idletasks()
         return self.frame.winfo_width()
     
     def winfo_height(self):
-        self.frame.master.update()
+        self.frame.master.update_idletasks()
         return self.frame.winfo_height()
 
     def winfo_x(self):
-        self.frame.master.update()
+        self.frame.master.update_idletasks()
         return self.frame.winfo_x()
     
     def winfo_y(self):
-        self.frame.master.update()
+        self.frame.master.update_idletasks()
         return self.frame.winfo_y()
 
     def dropdown_width(self):
@@ -721,6 +943,12 @@ class DropdownEntry():
     def text_value(self):
         return self.entry.get()
 
+    def set_text_value(self, text):
+        if text == self.entry.get():
+            return
+        self.entry.delete(0, tk.END)
+        self.entry.insert(0, text)
+
     def dropdown_value(self):
         return self.dropdown.value()
     
@@ -757,7 +985,8 @@ def rely(px, parent = window):
     return px / parent_height
 
 def get_x_y_from_widget(widget, anchor, shift_x_px = 0, shift_y_px = 0, parent = window):
-    parent.update()
+    # Lay out pending geometry only, ImageButtons know theirs already
+    parent.update_idletasks()
 
     # Top Left coordinates
     x, y = get_root_coords(root = parent, widget = widget)
@@ -795,92 +1024,54 @@ def update(scenario = False, miners = False, highlight_selected_miner = False, r
         raise ValueError("Neither `scenario` or `miners` is set to True.")
 
     if scenario:
-        # Scenario Label
-        scenario_label.configure(text=f"Scenario {current_scenario}")
-        scenario_label.place(anchor = tk.CENTER, relx = 0.5, rely = 0.07)
-
-        # Right Button
-        xy = get_x_y_from_widget(scenario_label, "e", 30)
-        right_button.place(anchor = tk.W, x = xy[0], y = xy[1])
-        right_button.disable() if current_scenario == len(scenarios) else right_button.enable()
+        # Only what changed gets touched, the header widgets stay where they were placed
 
-        # Left Button
-        xy = get_x_y_from_widget(scenario_label, "w", -30)
-        left_button.place(anchor = tk.E, x = xy[0], y = xy[1])
-        left_button.disable() if current_scenario == 1 else left_button.enable()
-
-        # Add Scenario Button
-        xy = get_x_y_from_widget(scenario_label, "s", 15, 20)
-        add_scenario_button.place(anchor = tk.NE, x = xy[0], y = xy[1])
+        # Scenario Label, the arrows only move if its width changed
+        scenario_label.configure(text=f"Scenario {current_scenario}")
+        place_scenario_arrows()
 
-        # Delete Scenario Button
-        xy = get_x_y_from_widget(add_scenario_button, "e", 10)
-        delete_scenario_button.place(anchor = tk.W, x = xy[0], y = xy[1])
-        delete_scenario_button.disable() if len(scenarios) == 1 else delete_scenario_button.enable()
+        # Right, Left and Delete Scenario Buttons
+        right_button.set_disabled(current_scenario == len(scenarios))
+        left_button.set_disabled(current_scenario == 1)
+        delete_scenario_button.set_disabled(len(scenarios) == 1)
 
         # Draw Separator
         draw_scenario_separator()
 
     if miners:
         if not highlight_selected_miner:
-            # Since we will clear all current miner frames,
-            # we need to set selected_miner to None.
+            # The miner frames get rebound to other miners,
+            # so we need to set selected_miner to None.
             selected_miner = None
 
-        # Destroy current miner frames
-        for frame in current_miner_frames:
-            frame.destroy()
-        current_miner_frames.clear()
-
-        # Clear current miner entries
-        current_scenario_entries.clear()
+        # Only the miner frames that are visible get rebound
+        miners_container_frame.set_row_count(len(scenarios[current_scenario - 1]), reset_y = reset_y)
 
-        # Add new miner frames
-        for index, miner in enumerate(scenarios[current_scenario - 1]):
-            miner_frame = create_miner_frame(hashrate = miner["hashrate"],
-                                             bonus = miner["bonus"],
-                                             price = miner["price"],
-                                             index = index)
-
-            if highlight_selected_miner and index == selected_miner:
-                miner_frame.select()
-
-            current_miner_frames.append(miner_frame)
-        
-        miners_container_frame.manual_height_update(reset_y = reset_y)
-
-def create_miner_frame(hashrate, bonus, price, index):
-    # Creates a miner frame and positions it in the given row index
-    # inside miners_container_frame, and then it returns the Frame object
-
-    # hashrate example: "15.7 Ph/s"
-    # bonus example: "2"
-    # price example: "5"
+def create_miner_frame(row):
+    # Creates an empty miner frame in the given row of miners_container_frame,
+    # bind_miner_frame then shows a miner in it. Returns the Frame object
 
     # Frame that contains miner entries
     miner_frame = SelectableFrame(parent = miners_container_frame,
                                   hover_color = miner_frame_hover_color,
                                   selection_color = miner_frame_selection_color,
                                   bg = miners_container_frame_bg,
-                                  click_handler = lambda event: select_miner(current_miner_frames.index(event.widget)))
-    miner_frame.grid(row = index, column = 0)
+                                  click_handler = lambda event: select_miner(miners_container_frame.index_of(event.widget)))
+    miner_frame.grid(row = row, column = 0)
 
     # Hashrate Entry
     hashrate_entry = DropdownEntry(miner_frame, auto_update_gap_color = True, width = 14, font_size = 15, border_size = 1, dropdown_items = power_units, default_item = 1)
-    hashrate_entry.insert(0, hashrate.split(" ")[0]) if hashrate else None # Set entry text value
-    hashrate_entry.dropdown.set_selected_item_by_value(hashrate.split(" ")[1]) if hashrate else None # Set dropdown value
     hashrate_entry.grid(row = 0, column = 0, padx = (10, 0), pady = 10)
 
     # Bonus Entry
     bonus_entry = DropdownEntry(miner_frame, auto_update_gap_color = True, width = 14, font_size = 15, border_size = 1, dropdown_items = "%")
-    bonus_entry.insert(0, str(bonus)) if bonus else None
     bonus_entry.grid(row = 0, column = 1, padx = (hashrate_entry.dropdown_width() + 10, 0), pady = 10)
 
     # Price Entry
     price_entry = DropdownEntry(miner_frame, auto_update_gap_color = True, width = 14, font_size = 15, border_size = 1, dropdown_items = "RLT")
-    price_entry.insert(0, str(price)) if price else None
     price_entry.grid(row = 0, column = 2, padx = (bonus_entry.dropdown_width() + 10, 50), pady = 10)
 
+    current_miner_frames.append(miner_frame)
     current_scenario_entries.append({
         "hashrate_entry": hashrate_entry,
         "bonus_entry": bonus_entry,
@@ -889,39 +1080,52 @@ def create_miner_frame(hashrate, bonus, price, index):
 
     return miner_frame
 
-def convert_power_to_gh(power, unit):
-    units =  ['Gh/s', 'Th/s', 'Ph/s', 'Eh/s']
-    if unit not in units:
-        raise ValueError("The given unit is not available.")
-    return float(power) * 10 ** (3 * units.index(unit))
+def bind_miner_frame(miner_frame, index):
+    # Shows the miner at `index` of the current scenario in miner_frame
+
+    # hashrate example: "15.7 Ph/s"
+    # bonus example: "2"
+    # price example: "5"
+    miner = scenarios[current_scenario - 1][index]
+    entries = current_scenario_entries[current_miner_frames.index(miner_frame)]
+
+    if miner["hashrate"]:
+        set_power_text(entries["hashrate_entry"], miner["hashrate"])
+    else:
+        entries["hashrate_entry"].set_text_value("")
+        entries["hashrate_entry"].dropdown.set_selected_item_by_index(1)
+    entries["bonus_entry"].set_text_value(str(miner["bonus"]) if miner["bonus"] is not None else "")
+    entries["price_entry"].set_text_value(str(miner["price"]) if miner["price"] is not None else "")
+
+    if (index == selected_miner) != miner_frame.selected:
+        miner_frame.select() if index == selected_miner else miner_frame.deselect()
+
+def save_miner_frame(miner_frame, index):
+    # Saves the values of miner_frame's entries as the miner at `index` of the current scenario
+    entries = current_scenario_entries[current_miner_frames.index(miner_frame)]
+
+    bonus_value = entries["bonus_entry"].text_value()
+    price_value = entries["price_entry"].text_value()
+
+    miner = {
+        "hashrate": get_power_text(entries["hashrate_entry"]),
+        "bonus": bonus_value if bonus_value != "" else None,
+        "price": price_value if price_value != "" else None
+    }
+    # A catalog miner stays linked to the catalog until one of its values gets changed
+    previous = scenarios[current_scenario - 1][index]
+    if previous.get("id") is not None and all(previous[field] == miner[field] for field in miner):
+        miner["id"] = previous["id"]
+    scenarios[current_scenario - 1][index] = miner
 
 def save_current_scenario_conf():
-    # This function loops through all entries in the current_scenario
-    # and saves their values in the scenarios dictoinary
-
-    current_scenario_data = []
-    for miner in current_scenario_entries:
-        hashrate_entry = miner["hashrate_entry"]
-        bonus_entry = miner["bonus_entry"]
-        price_entry = miner["price_entry"]
-
-        hashrate_value, hashrate_unit = hashrate_entry.get_full_value()
-        bonus_value = bonus_entry.text_value()
-        price_value = price_entry.text_value()
-
-        hashrate_value = hashrate_value + " " + hashrate_unit if hashrate_value != "" else None
-        bonus_value = bonus_value if bonus_value != "" else None
-        price_value = price_value if price_value != "" else None
-
-        current_scenario_data.append({
-            "hashrate": hashrate_value,
-            "bonus": bonus_value,
-            "price": price_value
-        })
-    
-    scenarios[current_scenario - 1] = current_scenario_data
+    # Saves the values of the visible miner frames in the scenarios list,
+    # the other miners were saved when their frames got rebound
+    for miner_frame, index in zip(current_miner_frames, miners_container_frame.row_indices):
+        if index is not None:
+            save_miner_frame(miner_frame, index)
 
-    return current_scenario_data
+    return scenarios[current_scenario - 1]
 
 def get_distinct_colors(num_colors):
     cm = plt.get_cmap('gist_rainbow')
@@ -943,21 +1147,20 @@ def convertPower(power):
     unit = units[i]
     return f"{power:.3f} {unit}"
 
-def set_annotation(sel, scenario_index, scenario_color,
-                   unbonused_power_history, bonused_power_history,
-                   bonus_history, reward_history):
+def set_annotation(sel, scenario_index, scenario_color, projection, projection_index):
     try:
         x, y = sel.target
+        state = projection.state_at(projection_index, x)
         sel.annotation.set(ma = "left", ha = "left")
         sel.annotation.set_text(
             f"Scenario: {scenario_index + 1}\n" \
             f"Day: {int(x)}\n" \
             f"Time: {get_time_from_days(x - int(x))}\n" \
             f"Balance: {round(y, 4)} RLT\n" \
-            f"Power (Without Bonus): {convertPower(unbonused_power_history[int(x)])}\n" \
-            f"Power (With Bonus): {convertPower(bonused_power_history[int(x)])}\n" \
-            f"Bonus Percentage: {round(bonus_history[int(x)] * 100, 2)} %\n"\
-            f"Reward (Per 10 mins): {round(reward_history[int(x)], 6)} RLT"
+            f"Power (Without Bonus): {convertPower(state['unbonused_power'])}\n" \
+            f"Power (With Bonus): {convertPower(state['bonused_power'])}\n" \
+            f"Bonus Percentage: {round(state['bonus'] * 100, 2)} %\n"\
+            f"Reward (Per 10 mins): {round(state['reward'], 6)} RLT"
         )
         sel.annotation.get_bbox_patch().set(fc = scenario_color, alpha = 0.9, boxstyle = "roundtooth")
         sel.annotation.set_color(mpl_background_color)
@@ -967,72 +1170,123 @@ def set_annotation(sel, scenario_index, scenario_color,
         pass
     # print(dir(sel.annotation))
 
-def generate_graph(balance, total_power, total_bonus, network_power, block_reward, days, miners_data):
-    fig, ax = plt.subplots()
+def create_graph(days, scenario_count, chunk_count, fig = None):
+    # Creates the figure of a graph (or clears `fig` to reuse its window) and returns the graph's state.
+    # The scenarios get plotted later, as their projections arrive (see add_projection_to_graph).
+    if fig is None:
+        fig, ax = plt.subplots()
 
-    # Change icon of window
-    thismanager = plt.get_current_fig_manager()
-    thismanager.window.wm_iconbitmap('assets/Icon/icon.ico')
+        # Change icon of window
+        thismanager = plt.get_current_fig_manager()
+        thismanager.window.wm_iconbitmap('assets/Icon/icon.ico')
 
-    # Set Title of window
-    fig.canvas.manager.set_window_title('Roller Prediction Graph')
+        # Set Title of window
+        fig.canvas.manager.set_window_title('Roller Prediction Graph')
+    else:
+        fig.clear()
+        ax = fig.add_subplot()
 
     # Set Title of graph
     ax.set_title("RLT Prediction Over Time [" + datetime.now().strftime("%Y-%m-%d %H:%M:%S") + "]")
 
     ax.set_ylabel("--- RLT -->") # Set name of Y axis
     ax.set_xlabel("--- Days -->") # Set name of X axis
-    scenario_colors = get_distinct_colors(len(miners_data)) # Get distinct color for each plot
-    ax.set_prop_cycle(color = scenario_colors) # Set color cycle
-
-    for index, scenario in enumerate(miners_data):
-        scenario_balance = balance
-        scenario_bonus_pct = total_bonus / 100
-        scenario_unbonused_power = total_power # Power from games and miners
-        current_miner = 0 # Index of miner to buy
-        graph_x = range(1, days + 1)
-        balance_history = []
-        unbonused_power_history = []
-        bonused_power_history = []
-        bonus_history = []
-        reward_history = []
-
-        for day in range(days):
-            if current_miner < len(scenario):
-                if scenario_balance >= scenario[current_miner]["price"]:
-                    scenario_balance -= scenario[current_miner]["price"]
-                    scenario_unbonused_power += scenario[current_miner]["hashrate"]
-                    scenario_bonus_pct += scenario[current_miner]["bonus"] / 100
-                    current_miner += 1
-            
-            bonused_power = scenario_unbonused_power * (1 + scenario_bonus_pct)
-            reward_per_10_mins = bonused_power / network_power * block_reward
-
-            scenario_balance += reward_per_10_mins * 6 * 24
-            balance_history.append(scenario_balance)
-            unbonused_power_history.append(scenario_unbonused_power)
-            bonused_power_history.append(bonused_power)
-            bonus_history.append(scenario_bonus_pct)
-            reward_history.append(reward_per_10_mins)
-
-        scenario_plot = ax.plot(graph_x, balance_history)
-        cur = mplcursors.cursor(scenario_plot, hover = mplcursors.HoverMode.Transient)
-        cur.connect("add",
-        lambda sel,
-               i = index,
-               uph = unbonused_power_history,
-               bph = bonused_power_history,
-               bh = bonus_history,
-               rh = reward_history: set_annotation(sel, i, scenario_colors[i], uph, bph, bh, rh))
-
-    ax.legend([f"Scenario {i + 1}" for i in range(len(miners_data))], loc = "upper left")
+    ax.set_xlim(0, days) # Keep the X axis still while chunks of scenarios arrive
+
+    return {
+        "fig": fig,
+        "ax": ax,
+        "scenario_colors": get_distinct_colors(scenario_count), # Get distinct color for each plot
+        "scenario_plots": [None] * scenario_count,
+        "cursors": [],
+        "chunks_left": chunk_count
+    }
+
+def add_projection_to_graph(graph, start, projection):
+    # Plots a chunk of scenarios, starting with scenario number `start` (0 based).
+    # Returns True once every chunk of the graph has been plotted.
+    ax = graph["ax"]
+    scenario_colors = graph["scenario_colors"]
+    scenario_plots = graph["scenario_plots"]
+
+    # Only the balance gets filled in, the annotations read the rest from the purchase events
+    for offset in range(len(projection)):
+        index = start + offset
+        scenario_plots[index], = ax.plot(*projection.balance_curve(offset), color = scenario_colors[index])
+        cur = mplcursors.cursor(scenario_plots[index], hover = mplcursors.HoverMode.Transient)
+        cur.connect("add", lambda sel, i = index, p = projection, o = offset: set_annotation(sel, i, scenario_colors[i], p, o))
+        graph["cursors"].append(cur)
+
+    graph["chunks_left"] -= 1
+    if graph["chunks_left"] == 0:
+        ax.legend(scenario_plots, [f"Scenario {i + 1}" for i in range(len(scenario_plots))], loc = "upper left")
+
+    # Draw the scenarios we have so far
+    ax.relim()
+    ax.autoscale_view()
+    graph["fig"].canvas.draw_idle()
+    plt.show(block = False)
+
+    return graph["chunks_left"] == 0
+
+def graph_worker(message_queue, reuse_window = False):
+    # Long lived process that draws every graph, so matplotlib and the rest of this module
+    # only get imported once instead of on every Generate click. It's fed through message_queue:
+    #   - ("graph", graph_id, days, scenario_count, chunk_count) creates a new graph.
+    #   - ("projection", graph_id, start_index, projection) plots a chunk of scenarios in its graph.
+    #   - None stops the worker once all its windows are closed.
+    # If reuse_window is True, a new graph replaces the last one if its window is still open.
+    plotting_time = load_plotting()
+    if "--startup-times" in sys.argv:
+        print(f"Graph worker loaded the plotting stack in {plotting_time * 1000:.1f} ms")
+
+    graphs = {}
+    last_fig = None
+
+    while True:
+        try:
+            # Keep the open windows responsive while waiting
+            message = message_queue.get(timeout = 0.05) if plt.get_fignums() else message_queue.get()
+        except queue.Empty:
+            plt.pause(0.05)
+            continue
+
+        if message is None:
+            break
+
+        kind, graph_id, *data = message
+        if kind == "graph":
+            fig = last_fig if reuse_window and last_fig is not None and plt.fignum_exists(last_fig.number) else None
+            graphs[graph_id] = create_graph(*data, fig = fig)
+            last_fig = graphs[graph_id]["fig"]
+
+        elif kind == "projection" and graph_id in graphs:
+            start, projection = data
+            if isinstance(projection, Exception):
+                # Don't take the worker down with it, the other graphs are still fine
+                traceback.print_exception(projection)
+                del graphs[graph_id]
+                continue
+
+            if add_projection_to_graph(graphs[graph_id], start, projection):
+                del graphs[graph_id]
 
     plt.show()
 
 def show_error(title, message):
     ctypes.windll.user32.MessageBoxW(0, message, title, 16)
 
+def evaluate_field(value, name):
+    # Returns the value of a field (it can be an arithmetic expression), or shows an error and returns None
+    try:
+        return evaluate(value)
+    except ExpressionError as error:
+        show_error("Invalid Value", f"{name}: {error}")
+        return None
+
 def on_generate_click():
+    global graph_count
+
     # Update put current_scenario's data in the scenarios dict
     save_current_scenario_conf()
 
@@ -1046,42 +1300,57 @@ def on_generate_click():
     if balance == "":
         show_error("Field Required", "RLT Balance is not set.")
         return
-    balance = float(eval(balance))
+    balance = evaluate_field(balance, "RLT Balance")
+    if balance is None:
+        return
 
     # Total Power
     total_power, total_power_unit = total_power_entry.get_full_value()
     if total_power == "":
         show_error("Field Required", "Total Power is not set.")
         return
-    total_power = convert_power_to_gh(eval(total_power), total_power_unit)
+    total_power = evaluate_field(total_power, "Total Power")
+    if total_power is None:
+        return
+    total_power = convert_power_to_gh(total_power, total_power_unit)
 
     # Total Bonus
     total_bonus = bonus_pct_entry.text_value()
     if total_bonus == "":
         show_error("Field Required", "Total Bonus is not set.")
         return
-    total_bonus = float(eval(total_bonus))
+    total_bonus = evaluate_field(total_bonus, "Total Bonus")
+    if total_bonus is None:
+        return
 
     # RLT Network Power
     network_power, network_power_unit = network_power_entry.get_full_value()
     if network_power == "":
         show_error("Field Required", "RLT Network Power is not set.")
         return
-    network_power = convert_power_to_gh(eval(network_power), network_power_unit)
+    network_power = evaluate_field(network_power, "RLT Network Power")
+    if network_power is None:
+        return
+    network_power = convert_power_to_gh(network_power, network_power_unit)
 
     # RLT Block Reward
     block_reward = block_reward_entry.text_value()
     if block_reward == "":
         show_error("Field Required", "RLT Block Reward is not set.")
         return
-    block_reward = float(eval(block_reward))
+    block_reward = evaluate_field(block_reward, "RLT Block Reward")
+    if block_reward is None:
+        return
 
     # Days
     days = days_entry.text_value()
     if days == "":
         show_error("Field Required", "Duration is not set.")
         return
-    days = int(float(eval(days)))
+    days = evaluate_field(days, "Duration")
+    if days is None:
+        return
+    days = int(days)
 
     # print("RLT Balance:      ", balance)
     # print("Total Power:      ", total_power)
@@ -1093,7 +1362,7 @@ def on_generate_click():
     # Check if all miner infos are available, and convert powers to Gh/s
     miners_data = [] # Represents the converted version of scenarios
     for i in range(len(scenarios)):
-        miners_data.append([]) # Add scenario to data
+        miners = [] # Miners of the scenario, turned into a Scenario at once
         for j in range(len(scenarios[i])):
             miner = scenarios[i][j]
             if miner["hashrate"] is None:
@@ -1105,36 +1374,102 @@ def on_generate_click():
             if miner["price"] is None:
                 show_error("Miner Info Incomplete", f"Price of miner {j + 1} in scenario {i + 1} is not set.")
                 return
-            miner_hashrate_value, miner_hashrate_unit = miner["hashrate"].split(" ")
-            miners_data[-1].append({
-                "hashrate": convert_power_to_gh(eval(miner_hashrate_value), miner_hashrate_unit),
-                "bonus": eval(miner["bonus"]),
-                "price": eval(miner["price"])
-            })
-
-    p = multiprocessing.Process(target=generate_graph, kwargs = {
-        "balance": balance,
-        "total_power": total_power,
-        "total_bonus": total_bonus,
-        "network_power": network_power,
-        "block_reward": block_reward,
-        "days": days,
-        "miners_data": miners_data
-    })
+            try:
+                # The hashrate is saved with its unit, like "15.7 Ph/s"
+                miners.append(Miner(miner["hashrate"], miner["bonus"], miner["price"]))
+            except ValueError as error:
+                show_error("Miner Info Invalid", f"Miner {j + 1} in scenario {i + 1}: {error}")
+                return
+        miners_data.append(Scenario(miners)) # Add scenario to data
+
+    try:
+        # Also checks that the network power and block reward give a yield that can be projected
+        same_parameters = projector.prepare(balance, total_power, total_bonus, network_power, block_reward, days, step = projection_step)
+    except ValueError as error:
+        show_error("Invalid Value", str(error))
+        return
+
+    graph_count += 1
+    graph_id = graph_count
+    message_queue = get_graph_queue()
+
+    # Going back to a configuration that was already projected
+    cache_key = projection_cache.key(balance, total_power, total_bonus, network_power, block_reward, days, miners_data, step = projection_step)
+    projection = projection_cache.get(cache_key)
+    if projection is not None:
+        message_queue.put(("graph", graph_id, days, len(miners_data), 1))
+        message_queue.put(("projection", graph_id, 0, projection))
+        return
+
+    if same_parameters:
+        # Same main parameters as last time. When most scenarios can reuse their checkpoints, only the ones
+        # that changed get projected again, right here. Otherwise it's not worth blocking the window for.
+        diff = projector.diff(miners_data)
+        reused = diff["stats"]["skipped"] + diff["stats"]["resumed"]
+        if reused > 0 and reused >= diff["stats"]["projected"]:
+            projection = projector.project(miners_data, diff = diff)
+            projection.history("balance") # The graph plots it, so it's cached filled in
+            projection_cache.put(cache_key, projection)
+            message_queue.put(("graph", graph_id, days, len(miners_data), 1))
+            message_queue.put(("projection", graph_id, 0, projection))
+            return
+
+    # Otherwise scenarios get projected in the shared process pool, and each chunk is
+    # streamed to the graph worker as soon as it's done. The pool fills in the balance history
+    # the graph plots, so it's computed in parallel and the cached projection holds it too.
+    generation = projector.generation
+    chunk_count = len(split_scenarios(miners_data))
+    chunks = {}
+    def on_result(start, projection):
+        if not isinstance(projection, Exception):
+            projector.add(start, projection, miners_data, generation)
+            chunks[start] = projection
+            if len(chunks) == chunk_count:
+                projection_cache.put(cache_key, join_projections([chunks[start] for start in sorted(chunks)]))
+        message_queue.put(("projection", graph_id, start, projection))
+
+    message_queue.put(("graph", graph_id, days, len(miners_data), chunk_count))
+    submit_projections(balance, total_power, total_bonus, network_power, block_reward, days, miners_data,
+                       on_result = on_result, step = projection_step, fill = ("balance",))
     # print(total_power)
     # print(total_bonus)
     # print(network_power)
     # print(block_reward)
     # print(days)
     # print(miners_data)
-    p.start()
+
+graph_process = None
+graph_queue = None
+graph_count = 0 # Used to give every graph its own id
+projector = IncrementalProjector() # Keeps the purchase events of every scenario between two Generate clicks
+projection_cache = ProjectionCache() # Last configurations that were projected
+
+def get_graph_queue():
+    # Returns the queue that feeds the graph worker, (re)starting the worker if it isn't running.
+    # With --reuse-graph-window, every graph gets drawn in the same window instead of opening a new one.
+    global graph_process, graph_queue
+    if graph_process is None or not graph_process.is_alive():
+        graph_queue = multiprocessing.Queue()
+        graph_process = multiprocessing.Process(target = graph_worker, args = (graph_queue, "--reuse-graph-window" in sys.argv))
+        graph_process.start()
+    return graph_queue
+
+def stop_graph_worker():
+    # The worker exits once its windows get closed
+    if graph_process is not None and graph_process.is_alive():
+        graph_queue.put(None)
         
 scenarios = [] # [[{"price": miner1_price, "hashrate": miner1_hashrate, "bonus": miner1_bonus}, ...other miners in scenario], ...other scenarios]
 current_scenario = None
 scenario_separators = []
-current_miner_frames = [] # Miner frames of current scenario
-selected_miner = None # Index of selected miner frame
-current_scenario_entries = [] # [{"hashrate_entry": hasrate_entry1, "bonus_entry": bonus_entry1, "price_entry": price_entry1}, ...other miners in current_scenario]
+separators_scenario_count = 0 # Number of scenarios scenario_separators were drawn for
+highlighted_separator = None # Index of the separator of current_scenario, None when there's only one scenario
+scenario_indicator = None # Frame showing where current_scenario is, used instead of separators when there are too many scenarios
+scenario_label_center = None # Coordinates of scenario_label's center, it's placed once
+scenario_label_width = None # Width of scenario_label when the arrows were placed
+current_miner_frames = [] # Miner frames of miners_container_frame, from top to bottom. They get rebound to other miners while scrolling
+selected_miner = None # Index of selected miner in the current scenario
+current_scenario_entries = [] # [{"hashrate_entry": hasrate_entry1, "bonus_entry": bonus_entry1, "price_entry": price_entry1}, ...entries of the other miner frames]
 
 def add_new_scenario(_update = True):
     global current_scenario
@@ -1169,7 +1504,6 @@ def remove_miner(miner_index):
     # Remove a miner from the list representing the current scenario inside the scenarios dict
     # This function has nothing to do with updating the display whatsoever
     scenarios[current_scenario - 1].pop(miner_index)
-    current_scenario_entries.pop(miner_index)
 
 def select_miner(miner_index, highlight_selected_miner = True, unhighlight_previous_selection = True):
     global selected_miner
@@ -1178,19 +1512,20 @@ def select_miner(miner_index, highlight_selected_miner = True, unhighlight_previ
 
     if miner_index == selected_miner:
         # Unselect miner
-        current_miner_frames[miner_index].deselect()
+        miners_container_frame.row_widget(miner_index).deselect()
         selected_miner = None
         # Disable buttons that need selection
         disable_selection_buttons()
         return
 
     if unhighlight_previous_selection and selected_miner is not None:
-        # Unhighlight current miner
-        current_miner_frames[selected_miner].deselect()
+        # Unhighlight current miner, if it's not scrolled out of view
+        previous_frame = miners_container_frame.row_widget(selected_miner)
+        previous_frame.deselect() if previous_frame else None
     
     if highlight_selected_miner:
         # Highlight miner
-        current_miner_frames[miner_index].select()
+        miners_container_frame.row_widget(miner_index).select()
 
     selected_miner = miner_index
     # Enable buttons that need selection
@@ -1214,23 +1549,215 @@ def right_button_on_click():
     current_scenario += 1
     update(scenario = True, miners = True)
 
+def get_power_text(entry):
+    # "15.7 Ph/s" from a power entry, or None if it's empty
+    value, unit = entry.get_full_value()
+    return value + " " + unit if value != "" else None
+
+def set_power_text(entry, power):
+    # Opposite of get_power_text
+    # The unit is the last word, the value can be an expression with spaces like "12.5 * 2"
+    entry.set_text_value(power.rsplit(" ", 1)[0] if power else "")
+    entry.dropdown.set_selected_item_by_value(power.rsplit(" ", 1)[1]) if power else None
+
+def on_save_workspace(event = None):
+    # Saves the main parameters and every scenario, as a binary workspace or exported to JSON
+    save_current_scenario_conf()
+    path = filedialog.asksaveasfilename(title = "Save Workspace",
+                                        defaultextension = ".rltw",
+                                        filetypes = [("Roller Predicter Workspace", "*.rltw"), ("JSON", "*.json")])
+    if not path:
+        return
+
+    parameters = {
+        "balance": balance_entry.text_value(),
+        "power": get_power_text(total_power_entry),
+        "bonus": bonus_pct_entry.text_value(),
+        "network_power": get_power_text(network_power_entry),
+        "block_reward": block_reward_entry.text_value(),
+        "days": days_entry.text_value(),
+        "catalog": catalog_path
+    }
+    try:
+        save_workspace(path, parameters, scenarios)
+    except (OSError, ValueError) as error:
+        show_error("Workspace Not Saved", str(error))
+
+def on_open_workspace(event = None):
+    # Replaces the main parameters and the scenarios with the ones of a workspace. Only the miners
+    # of the first scenario get widgets, the others get read once they're shown.
+    global scenarios, current_scenario
+    path = filedialog.askopenfilename(title = "Open Workspace",
+                                      filetypes = [("Roller Predicter Workspace", "*.rltw"), ("JSON", "*.json")])
+    if not path:
+        return
+
+    try:
+        parameters, loaded_scenarios = load_workspace(path)
+        if len(loaded_scenarios) > 0:
+            loaded_scenarios[0] # Shown right away, so a broken one is found before anything gets replaced
+    except (OSError, ValueError) as error:
+        show_error("Workspace Not Opened", str(error))
+        return
+
+    balance_entry.set_text_value(parameters.get("balance") or "")
+    set_power_text(total_power_entry, parameters.get("power"))
+    bonus_pct_entry.set_text_value(parameters.get("bonus") or "")
+    set_power_text(network_power_entry, parameters.get("network_power"))
+    block_reward_entry.set_text_value(parameters.get("block_reward") or "")
+    days_entry.set_text_value(parameters.get("days") or "")
+    if parameters.get("catalog") and import_catalog(parameters["catalog"]):
+        if catalog_window is not None and catalog_window.winfo_exists():
+            open_catalog_window()
+
+    scenarios = loaded_scenarios
+    if len(scenarios) == 0:
+        scenarios.append([])
+    current_scenario = 1
+    update(scenario = True, miners = True)
+
+catalog = None # MinerCatalog imported with Ctrl+I, or the one of the opened workspace
+catalog_path = None # Path of catalog, saved in workspaces
+catalog_window = None
+
+def import_catalog(path):
+    # Returns whether the catalog could be read
+    global catalog, catalog_path
+    try:
+        catalog = MinerCatalog.read(path)
+    except (OSError, ValueError) as error:
+        show_error("Catalog Not Imported", str(error))
+        return False
+    catalog_path = path
+    return True
+
+def on_import_catalog(event = None):
+    path = filedialog.askopenfilename(title = "Import Miner Catalog",
+                                      filetypes = [("CSV", "*.csv"), ("JSON", "*.json")])
+    if path and import_catalog(path):
+        open_catalog_window()
+
+def open_catalog_window():
+    # Lists the miners of the catalog, filtered by name and price, and sorted by price or by hashrate per RLT.
+    # Double clicking a miner adds it to the current scenario.
+    global catalog_window
+    if catalog_window is not None and catalog_window.winfo_exists():
+        catalog_window.destroy()
+
+    catalog_window = tk.Toplevel(window, bg = bg)
+    catalog_window.title("Miner Catalog")
+    catalog_window.wm_iconbitmap('assets/Icon/icon.ico')
+
+    filters_frame = tk.Frame(catalog_window, bg = bg)
+    filters_frame.pack(fill = tk.X, padx = 10, pady = 10)
+
+    tk.Label(filters_frame, text = "Name:", font = (roller_font_name, 15), bg = bg, fg = "white").grid(row = 0, column = 0, sticky = tk.W)
+    name_entry = DropdownEntry(filters_frame, width = 20, font_size = 15, border_size = 1, numeric_only = False)
+    name_entry.grid(row = 0, column = 1, columnspan = 3, sticky = tk.W, padx = 5, pady = 2)
+
+    tk.Label(filters_frame, text = "Price:", font = (roller_font_name, 15), bg = bg, fg = "white").grid(row = 1, column = 0, sticky = tk.W)
+    min_price_entry = DropdownEntry(filters_frame, width = 7, font_size = 15, border_size = 1)
+    min_price_entry.grid(row = 1, column = 1, padx = 5, pady = 2)
+    tk.Label(filters_frame, text = "to", font = (roller_font_name, 15), bg = bg, fg = "white").grid(row = 1, column = 2)
+    max_price_entry = DropdownEntry(filters_frame, width = 7, font_size = 15, border_size = 1, dropdown_items = "RLT")
+    max_price_entry.grid(row = 1, column = 3, padx = 5, pady = 2)
+
+    sort_by_efficiency = tk.BooleanVar(catalog_window, value = True)
+    tk.Checkbutton(filters_frame, text = "Best hashrate per RLT first", variable = sort_by_efficiency,
+                   font = (roller_font_name, 15), bg = bg, fg = "white", selectcolor = entry_color,
+                   activebackground = bg, activeforeground = "white",
+                   command = lambda: refresh()).grid(row = 2, column = 0, columnspan = 4, sticky = tk.W)
+
+    list_frame = tk.Frame(catalog_window, bg = bg)
+    list_frame.pack(fill = tk.BOTH, expand = True, padx = 10, pady = (0, 10))
+    scrollbar = tk.Scrollbar(list_frame)
+    scrollbar.pack(side = tk.RIGHT, fill = tk.Y)
+    miner_list = tk.Listbox(list_frame, width = 60, height = 20, font = (roller_font_name, 13), bg = entry_color, fg = "white",
+                            selectbackground = miner_frame_selection_color, highlightthickness = 1,
+                            highlightbackground = entry_border_color, borderwidth = 0, yscrollcommand = scrollbar.set)
+    miner_list.pack(side = tk.LEFT, fill = tk.BOTH, expand = True)
+    scrollbar.configure(command = miner_list.yview)
+
+    shown_rows = []
+    def refresh(event = None):
+        try:
+            low = evaluate(min_price_entry.text_value()) if min_price_entry.text_value() else 0
+            high = evaluate(max_price_entry.text_value()) if max_price_entry.text_value() else float("inf")
+        except ExpressionError:
+            return # Still being typed
+        rows = catalog.search_rows(name_entry.text_value(), low, high, by_efficiency = sort_by_efficiency.get())
+
+        shown_rows[:] = rows.tolist()
+        miner_list.delete(0, tk.END)
+        miner_list.insert(tk.END, *[f"{catalog.names[row]}  |  {format_power(hashrate)}  |  {bonus:g}%  |  {price:g} RLT"
+                                    for row, (hashrate, bonus, price) in zip(shown_rows, catalog.miners.values[rows].tolist())])
+
+    def add_selected_miner(event = None):
+        selection = miner_list.curselection()
+        if not selection:
+            return
+        save_current_scenario_conf()
+        # The miner keeps its catalog id, so it still refers to the catalog in saved workspaces
+        scenarios[current_scenario - 1].append(catalog_miner(catalog, catalog.ids[shown_rows[selection[0]]]))
+        update(miners = True, reset_y = False)
+
+    for entry in (name_entry, min_price_entry, max_price_entry):
+        entry.entry.bind("<KeyRelease>", refresh)
+    miner_list.bind("<Double-Button-1>", add_selected_miner)
+    miner_list.bind("<Return>", add_selected_miner)
+    refresh()
+
+def place_scenario_arrows():
+    # Places the left and right buttons next to scenario_label, unless its width didn't change
+    global scenario_label_width
+
+    label_width = scenario_label.winfo_reqwidth()
+    if label_width == scenario_label_width:
+        return
+    scenario_label_width = label_width
+
+    x, y = scenario_label_center
+    right_button.place(anchor = tk.W, x = x + label_width / 2 + 30, y = y)
+    left_button.place(anchor = tk.E, x = x - label_width / 2 - 30, y = y)
+
 def draw_scenario_separator():
-    global scenario_separators
+    global scenario_separators, separators_scenario_count, highlighted_separator, scenario_indicator
 
     scenario_count = len(scenarios)
+    sep_padding = 10 # px
+
+    # With too many scenarios their separators wouldn't fit, a single one with an indicator on it is drawn instead
+    too_many = window_width - sep_padding * (scenario_count + 1) < min_separator_width * scenario_count
+
+    # Same number of scenarios, only move the indicator or recolor the separators of the previous and the new current scenario
+    if separators_scenario_count == scenario_count:
+        if too_many:
+            place_scenario_indicator()
+        elif highlighted_separator is not None and highlighted_separator != current_scenario - 1:
+            scenario_separators[highlighted_separator].configure(bg = default_sep_color)
+            scenario_separators[current_scenario - 1].configure(bg = light_green)
+            highlighted_separator = current_scenario - 1
+        return
+
     xy = get_x_y_from_widget(delete_scenario_button, "s", 0, 30)
 
     # Clean all previous separators
     for separator in scenario_separators:
         separator.destroy()
     scenario_separators = []
+    separators_scenario_count = scenario_count
+    if scenario_indicator is not None:
+        scenario_indicator.destroy()
+        scenario_indicator = None
 
-    sep_padding = 10 # px
-
-    if scenario_count == 1:
+    if scenario_count == 1 or too_many:
         separator = tk.Frame(window, bd=10, relief='sunken', height=4, width=window_width - sep_padding * 2, bg=default_sep_color, borderwidth=0)
         separator.place(anchor = tk.NW, x = sep_padding, y = xy[1])
         scenario_separators.append(separator)
+        highlighted_separator = None
+        if too_many:
+            scenario_indicator = tk.Frame(window, bd=10, relief='sunken', height=4, bg=light_green, borderwidth=0)
+            place_scenario_indicator()
     else:
         sep_width = ( window_width - sep_padding * (scenario_count + 1) ) / scenario_count
         for i in range(scenario_count):
@@ -1239,54 +1766,46 @@ def draw_scenario_separator():
             x = i * sep_width + (i + 1) * sep_padding
             separator.place(anchor = tk.NW, x = x, y = xy[1])
             scenario_separators.append(separator)
+        highlighted_separator = current_scenario - 1
+
+def place_scenario_indicator():
+    # Places scenario_indicator over the single separator, where current_scenario would have its own separator
+    sep_padding = 10 # px
+    track = scenario_separators[0]
+    track_width = window_width - sep_padding * 2
+    width = max(min_separator_width, track_width / len(scenarios))
+    x = sep_padding + (current_scenario - 1) * (track_width - width) / max(1, len(scenarios) - 1)
+    scenario_indicator.configure(width = width)
+    scenario_indicator.place(anchor = tk.NW, x = x, y = track.place_info()["y"])
+    scenario_indicator.lift()
 
 def on_add_miner_click():
+    # Save the visible miners, they get rebound
+    save_current_scenario_conf()
     # Add miner to the scenarios dictionary
-    miner_dict, index = add_miner()
+    add_miner()
     # Update the display
-    miner_frame = create_miner_frame(hashrate = miner_dict["hashrate"],
-                                     bonus = miner_dict["bonus"],
-                                     price = miner_dict["price"],
-                                     index = index)
-    current_miner_frames.append(miner_frame)
-    miners_container_frame.manual_height_update(reset_y = False)
+    miners_container_frame.set_row_count(len(scenarios[current_scenario - 1]))
 
 def on_remove_miner_click():
     global selected_miner
 
-    # Remove miner from the scenarios dictionary and current_scenario_entries
+    # Remove miner from the scenarios dictionary
+    save_current_scenario_conf()
     remove_miner(selected_miner)
+    miner_count = len(scenarios[current_scenario - 1])
 
-    # Update the display
-    # 1. Destroy the miner frame and remove it from the current_miner_frames list
-    current_miner_frames[selected_miner].destroy()
-    current_miner_frames.pop(selected_miner)
-    
-    # 2. Move all miner frames below it to fill the gap
-    for i in range(selected_miner, len(current_miner_frames)):
-        current_miner_frames[i].grid(row = i, column = 0)
-    
-    # 3. Update miner_container_frame's height, and set inner frame's y to 0 if scrollbar is invisible
-    miners_container_frame.manual_height_update()
-    if not miners_container_frame.scrollable:
-        miners_container_frame.update_inner_frame_position(0)
-
-    # 3. Highlight newly selected miner, if there's any
-    if len(current_miner_frames) == 0:
+    # Select the miner that's now in place of the deleted one, or the one above it
+    # if the deleted one was the last
+    if miner_count == 0:
         # No miner frame to select
         selected_miner = None
         disable_selection_buttons()
-        return
+    elif selected_miner >= miner_count:
+        selected_miner = miner_count - 1
 
-    if len(current_miner_frames) >= selected_miner + 1:
-        # We highlight the frame that was below the deleted one
-        # In other words, the frame that's now in place of the deleted one
-        current_miner_frames[selected_miner].select()
-        return
-    
-    # We select and highlight the frame that was above the delete one
-    selected_miner = len(current_miner_frames) - 1
-    current_miner_frames[selected_miner].select()
+    # Update the display, the miner frames below it get rebound to fill the gap
+    miners_container_frame.set_row_count(miner_count)
 
 def on_move_up_click():
     global selected_miner
@@ -1295,41 +1814,35 @@ def on_move_up_click():
         return
     
     # Update scenarios dict by flipping selected_miner and the one before it
+    save_current_scenario_conf()
     scenario = scenarios[current_scenario - 1]
     flip_list_indices(scenario, selected_miner - 1, selected_miner)
 
-    # Update the display
-    current_miner_frames[selected_miner].grid(row = selected_miner - 1, column = 0)
-    current_miner_frames[selected_miner - 1].grid(row = selected_miner, column = 0)
-
-    # Update current_miner_frames and current_scenario_entries
-    flip_list_indices(current_miner_frames, selected_miner - 1, selected_miner)
-    flip_list_indices(current_scenario_entries, selected_miner - 1, selected_miner)
-
     # Update selected_miner
     selected_miner -= 1
 
+    # Update the display
+    miners_container_frame.set_row_count(len(scenario))
+    miners_container_frame.see(selected_miner)
+
 def on_move_down_click():
     global selected_miner
 
-    if selected_miner == len(current_miner_frames) - 1:
+    if selected_miner == len(scenarios[current_scenario - 1]) - 1:
         return
     
-    # Update scenarios dict by flipping selected_miner and the one before it
+    # Update scenarios dict by flipping selected_miner and the one after it
+    save_current_scenario_conf()
     scenario = scenarios[current_scenario - 1]
     flip_list_indices(scenario, selected_miner, selected_miner + 1)
 
-    # Update the display
-    current_miner_frames[selected_miner].grid(row = selected_miner + 1, column = 0)
-    current_miner_frames[selected_miner + 1].grid(row = selected_miner, column = 0)
-
-    # Update current_miner_frames and current_scenario_entries
-    flip_list_indices(current_miner_frames, selected_miner, selected_miner + 1)
-    flip_list_indices(current_scenario_entries, selected_miner, selected_miner + 1)
-
     # Update selected_miner
     selected_miner += 1
 
+    # Update the display
+    miners_container_frame.set_row_count(len(scenario))
+    miners_container_frame.see(selected_miner)
+
 def flip_list_indices(l, i1, i2):
     l[i1], l[i2] = l[i2], l[i1]
 
@@ -1373,8 +1886,6 @@ if __name__ == "__main__":
                             on_click = right_button_on_click,
                             new_width = 50,
                             disabled = True)
-    xy = get_x_y_from_widget(scenario_label, "e", 30)
-    right_button.place(anchor = tk.W, x = xy[0], y = xy[1])
 
     # Left Button
     left_button = ImageButton(master = window,
@@ -1384,8 +1895,10 @@ if __name__ == "__main__":
                             on_click = left_button_on_click,
                             new_width = 50,
                             disabled = True)
-    xy = get_x_y_from_widget(scenario_label, "w", -30)
-    left_button.place(anchor = tk.E, x = xy[0], y = xy[1])
+
+    # Place both arrows next to scenario_label
+    scenario_label_center = get_x_y_from_widget(scenario_label, "center")
+    place_scenario_arrows()
 
     # Add Scenario Button
     add_scenario_button = ImageButton(master = window,
@@ -1518,10 +2031,13 @@ if __name__ == "__main__":
     price_label.place(anchor = tk.W, x = xy[0], y = xy[1])
 
     # Miners Container Frame
-    miners_container_frame = ScrollableFrame(window,
+    miners_container_frame = VirtualScrollableFrame(window,
                                             root = window,
                                             width = window_width * (1 - 2 * 0.04),
                                             height = 150,
+                                            create_row = create_miner_frame,
+                                            bind_row = bind_miner_frame,
+                                            save_row = save_miner_frame,
                                             bg = miners_container_frame_bg,
                                             border_size = 2,
                                             border_color = miners_container_frame_border_color)
@@ -1596,5 +2112,23 @@ if __name__ == "__main__":
     generate_button.place(anchor = tk.E, relx = 1 - relx(20), y = xy[1])
 
     update(scenario = False, miners = True)
+    startup_checkpoints.append(("widgets", perf_counter()))
+
+    # Workspaces
+    window.bind_all("<Control-s>", on_save_workspace)
+    window.bind_all("<Control-o>", on_open_workspace)
+
+    # Miner catalog
+    window.bind_all("<Control-i>", on_import_catalog)
+
+    # Startup ends once the window is drawn
+    def on_first_draw():
+        startup_checkpoints.append(("first draw", perf_counter()))
+        report_startup_times()
+    window.after_idle(on_first_draw)
+
+    window.mainloop()
 
-    window.mainloop()
\ No newline at end of file
+    # Stop the workers used to project scenarios and draw graphs
+    shutdown_executor()
+    stop_graph_worker()
\ No newline at end of file
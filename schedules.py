@@ -0,0 +1,64 @@
+# Network power and block reward schedules.
+# Turn simple descriptions of how a value changes over time into the arrays with one value per step
+# that simulation.project accepts for network_power and block_reward.
+import csv
+import os
+
+import numpy as np
+
+from expressions import to_number
+from simulation import steps_in
+
+def step_start_times(days, step = 1):
+    # Time at which each step starts, in days
+    return np.arange(steps_in(days, step)) * step
+
+def linear_schedule(start, growth, days, step = 1):
+    # Grows by `growth` percent of `start` every day (a negative growth shrinks it)
+    return start * (1 + growth / 100 * step_start_times(days, step))
+
+def step_schedule(start, changes, days, step = 1):
+    # Starts at `start` and switches to a new value on the given days, for example {30: 6e9, 90: 7e9}
+    change_days = sorted(float(day) for day in changes)
+    values = np.array([start] + [changes[day] for day in sorted(changes, key = float)], dtype = float)
+    return values[np.searchsorted(change_days, step_start_times(days, step), side = "right")]
+
+def csv_schedule(path, column, days, step = 1, convert = to_number):
+    # Reads the values of `column` from a CSV file that also has a `day` column (historical values
+    # for example). Each value holds until the next row's day, the first one also covers the days before it.
+    with open(path, newline = "") as file:
+        rows = [(float(row["day"]), convert(row[column])) for row in csv.DictReader(file)]
+    if not rows:
+        raise ValueError(f"{path} has no values.")
+
+    rows.sort()
+    return step_schedule(rows[0][1], dict(rows[1:]), days, step)
+
+def parse_schedule(spec, days, step = 1, convert = to_number, positive = False, directory = ""):
+    # Builds a schedule from its description (as found in scenario files):
+    #   - a single value:                          "5.3 Eh/s" or 30
+    #   - linear growth (percent per day):         {"start": "5.3 Eh/s", "growth": 0.3}
+    #   - step changes (day -> value):             {"start": 30, "changes": {"60": 25, "120": 20}}
+    #   - historical values from a CSV file:       {"csv": "history.csv", "column": "network_power"}
+    # `convert` turns each value into a number (simulation.parse_power for powers). CSV paths are
+    # relative to `directory` (the one of the scenario file). Values must stay above 0 when `positive`
+    # is True (like the network power), and can't be negative otherwise, so a shrinking schedule that
+    # goes too far raises a ValueError.
+    if not isinstance(spec, dict):
+        values = convert(spec)
+    elif "csv" in spec:
+        values = csv_schedule(os.path.join(directory, spec["csv"]), spec["column"], days, step, convert)
+    elif "growth" in spec:
+        values = linear_schedule(convert(spec["start"]), to_number(spec["growth"]), days, step)
+    elif "changes" in spec:
+        changes = {day: convert(value) for day, value in spec["changes"].items()}
+        values = step_schedule(convert(spec["start"]), changes, days, step)
+    else:
+        raise ValueError(f"Unknown schedule ({spec}).")
+
+    invalid = np.flatnonzero(~((np.atleast_1d(values) > 0) if positive else (np.atleast_1d(values) >= 0)))
+    if len(invalid):
+        day = invalid[0] * step if np.ndim(values) else 0
+        raise ValueError(f"The schedule {spec} reaches {np.atleast_1d(values)[invalid[0]]:g} on day {day:g}, "
+                         f"it must stay {'above' if positive else 'at or above'} 0.")
+    return values
@@ -0,0 +1,567 @@
+# Headless projection engine.
+# Nothing in here imports tkinter, matplotlib, PIL or pyglet, so it can be used
+# from scripts, servers and child processes without ever opening a window.
+import numpy as np
+
+from expressions import to_number
+
+# Constants
+power_units = ["Gh/s", "Th/s", "Ph/s", "Eh/s"]
+BLOCKS_PER_DAY = 6 * 24 # One RLT block every 10 minutes
+
+# Fields of a miner: hashrate (Gh/s), bonus (%) and price (RLT)
+MINER_FIELDS = ("hashrate", "bonus", "price")
+
+# Names of the per-day histories returned for each scenario
+HISTORY_FIELDS = ("balance", "unbonused_power", "bonused_power", "bonus", "reward")
+
+# Precisions the histories can be stored with, float32 halves their memory
+HISTORY_DTYPES = ("float64", "float32")
+
+# Fields a target can be set on with Projection.time_to
+GOAL_FIELDS = ("balance", "unbonused_power", "bonused_power", "bonus")
+
+def convert_power_to_gh(power, unit):
+    if unit not in power_units:
+        raise ValueError("The given unit is not available.")
+    return to_number(power) * 10 ** (3 * power_units.index(unit))
+
+def format_power(power):
+    # Opposite of parse_power, "15.7 Ph/s" from a power in Gh/s, in the largest unit that keeps the number above 1
+    unit = 0
+    while unit < len(power_units) - 1 and abs(power) >= 1000 ** (unit + 1):
+        unit += 1
+    return f"{power / 1000 ** unit:.10g} {power_units[unit]}"
+
+def parse_power(power):
+    # Returns a power in Gh/s, `power` is either a number (already in Gh/s)
+    # or a string with a unit like the ones the GUI saves, for example "15.7 Ph/s".
+    # The number in strings can also be an arithmetic expression (see expressions.py).
+    if isinstance(power, str):
+        parts = power.rsplit(None, 1)
+        if len(parts) == 2 and parts[1] in power_units:
+            return convert_power_to_gh(parts[0], parts[1])
+    return to_number(power)
+
+class Miner():
+    # A miner with its hashrate already in Gh/s, its bonus in percent and its price in RLT.
+    # Values are checked as soon as the miner is created, so a bad one never reaches a projection.
+    # It can also be read like the dicts used before, miner["hashrate"].
+    __slots__ = ("hashrate", "bonus", "price")
+
+    def __init__(self, hashrate, bonus, price):
+        self.hashrate = parse_power(hashrate)
+        self.bonus = to_number(bonus)
+        self.price = to_number(price)
+        for field in MINER_FIELDS:
+            value = getattr(self, field)
+            if not np.isfinite(value) or value < 0:
+                raise ValueError(f"Invalid {field} ({value}), it must be a positive number.")
+
+    @classmethod
+    def of(cls, miner):
+        # Returns `miner` as a Miner, it can also be a dict with the same fields
+        if isinstance(miner, cls):
+            return miner
+        return cls(miner["hashrate"], miner["bonus"], miner["price"])
+
+    def __getitem__(self, field):
+        if field not in MINER_FIELDS:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def __eq__(self, other):
+        return isinstance(other, Miner) and all(self[field] == other[field] for field in MINER_FIELDS)
+
+    def __repr__(self):
+        return f"Miner(hashrate = {self.hashrate:g}, bonus = {self.bonus:g}, price = {self.price:g})"
+
+class Scenario():
+    # Miners in order of purchase. They're stored as a single (miner x field) array in the order of
+    # MINER_FIELDS, so a scenario pickles as one buffer when it's sent to other processes.
+    __slots__ = ("values",)
+
+    def __init__(self, miners = ()):
+        miners = [Miner.of(miner) for miner in miners]
+        self.values = np.array([[miner[field] for field in MINER_FIELDS] for miner in miners], dtype = float).reshape(-1, len(MINER_FIELDS))
+
+    @classmethod
+    def from_arrays(cls, hashrates, bonuses, prices):
+        # Builds a scenario from one array per field (hashrates in Gh/s), checking them all at once
+        scenario = cls()
+        scenario.values = np.column_stack([np.asarray(hashrates, dtype = float), np.asarray(bonuses, dtype = float),
+                                           np.asarray(prices, dtype = float)]).reshape(-1, len(MINER_FIELDS))
+        if not np.isfinite(scenario.values).all() or (scenario.values < 0).any():
+            raise ValueError("Hashrates, bonuses and prices must be positive numbers.")
+        return scenario
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, index):
+        hashrate, bonus, price = self.values[index]
+        return Miner(hashrate, bonus, price)
+
+    def __iter__(self):
+        return (self[index] for index in range(len(self)))
+
+    def __eq__(self, other):
+        return isinstance(other, Scenario) and np.array_equal(self.values, other.values)
+
+    def __repr__(self):
+        return f"Scenario({list(self)})"
+
+    @property
+    def hashrates(self):
+        return self.values[:, 0]
+
+    @property
+    def bonuses(self):
+        return self.values[:, 1]
+
+    @property
+    def prices(self):
+        return self.values[:, 2]
+
+def pack_scenarios(scenarios):
+    # Turns a list of scenarios into three (scenario x miner) arrays: hashrates, bonuses and prices.
+    # Scenarios shorter than the longest one are padded with miners that can never be afforded.
+
+    # scenarios example: [Scenario([Miner(110000, 3, 7), ...other miners in order of purchase]), ...other scenarios]
+    # Lists of dicts like [{"hashrate": 110000, "bonus": 3, "price": 7}, ...] work too.
+    scenario_count = len(scenarios)
+    miner_count = max((len(scenario) for scenario in scenarios), default = 0)
+
+    hashrates = np.zeros((scenario_count, miner_count))
+    bonuses = np.zeros((scenario_count, miner_count))
+    prices = np.full((scenario_count, miner_count), np.inf)
+
+    for i, scenario in enumerate(scenarios):
+        if isinstance(scenario, Scenario):
+            count = len(scenario)
+            hashrates[i, :count], bonuses[i, :count], prices[i, :count] = scenario.values.T
+            continue
+
+        for j, miner in enumerate(scenario):
+            hashrates[i, j] = miner["hashrate"]
+            bonuses[i, j] = miner["bonus"]
+            prices[i, j] = miner["price"]
+
+    return hashrates, bonuses, prices
+
+class Projection():
+    # Result of `project`. It only holds the purchase events of each scenario (the segments
+    # between two purchases), the histories get filled in the first time they're asked for.
+    # Times are in days since the start of the projection, and can be fractions of a day.
+    def __init__(self, days, step, step_yield, segment_step, segment_balance, segment_power, segment_bonus,
+                 history_interval = 1, cumulative_yield = None, history_dtype = "float64"):
+        if history_dtype not in HISTORY_DTYPES:
+            raise ValueError(f"Unknown history precision ({history_dtype}), expected one of: {', '.join(HISTORY_DTYPES)}.")
+
+        self.days = days
+        self.step = step # Length of a simulation step, in days
+        self.steps = steps_in(days, step)
+        self.history_interval = history_interval # Time between two history values, in days
+        self.history_dtype = history_dtype
+
+        # RLT earned by 1 Gh/s (with bonus) during each step, see step_yields.
+        # Either a number, one value per step, or one row of values per scenario.
+        self.step_yield = step_yield
+        self.cumulative_yield = cumulative_yield if cumulative_yield is not None else cumulative_yields(step_yield)
+
+        # (scenario x segment) arrays, segment 0 starts on step 0 and segment k starts
+        # on the step miner k - 1 gets bought. Segments that are never reached start on step `steps`.
+        self.segment_step = segment_step
+        self.segment_balance = segment_balance # Balance right after the purchase
+        self.segment_power = segment_power # Without bonus
+        self.segment_bonus = segment_bonus # Ratio, not percentage
+
+        self._segment = None # (scenario x history time) index of the segment each history value belongs to
+        # Filled in histories, one (scenario x history time) array per field for all the scenarios together
+        self._histories = {}
+
+    def __len__(self):
+        return len(self.segment_step)
+
+    def times(self):
+        # Times of the history values, the end of each day by default
+        return np.arange(1, steps_in(self.days, self.history_interval) + 1) * self.history_interval
+
+    def history_steps(self):
+        # Number of steps passed at the time of each history value, as whole numbers when possible
+        steps = self.times() / self.step
+        whole_steps = np.round(steps).astype(np.int64)
+        return whole_steps if np.allclose(steps, whole_steps, rtol = 0, atol = 1e-9) else steps
+
+    def segment_time(self):
+        return self.segment_step * self.step
+
+    def purchase_counts(self):
+        # Number of miners each scenario buys within the projection
+        return np.count_nonzero(self.segment_step[:, 1:] < self.steps, axis = 1)
+
+    def purchase_times(self, scenario_index):
+        # Exact times at which each miner of the scenario gets bought
+        steps = self.segment_step[scenario_index, 1:]
+        return steps[steps < self.steps] * self.step
+
+    def earned_per_gh(self, rows, steps):
+        # RLT earned by 1 Gh/s (with bonus) from the start of the projection until `steps` steps
+        # have passed (can be a fraction of a step) for the scenarios in `rows`.
+        return yield_until(self.step_yield, self.cumulative_yield, rows, steps)
+
+    def reward_per_gh(self, rows, steps):
+        # Reward per 10 mins of 1 Gh/s (with bonus) during the step that ends after `steps` steps
+        step_index = np.clip(np.ceil(steps).astype(np.int64) - 1, 0, self.steps - 1)
+        if np.ndim(self.step_yield) == 0:
+            step_yield = self.step_yield
+        elif np.ndim(self.step_yield) == 1:
+            step_yield = self.step_yield[step_index]
+        else:
+            step_yield = self.step_yield[rows, step_index]
+        return step_yield / (BLOCKS_PER_DAY * self.step)
+
+    def state_at(self, scenario_index, time):
+        # Returns the value of every history field for a single scenario at any time,
+        # straight from the segments so nothing gets filled in. Like in the histories,
+        # a purchase made exactly at `time` isn't counted yet.
+        if not 0 <= time <= self.days:
+            raise IndexError(f"Time {time} is outside of the projection (0 to {self.days} days).")
+
+        segment = np.searchsorted(self.segment_time()[scenario_index, 1:], time, side = "left")
+        unbonused_power = self.segment_power[scenario_index, segment]
+        bonus = self.segment_bonus[scenario_index, segment]
+        bonused_power = unbonused_power * (1 + bonus)
+        earned = self.earned_per_gh(scenario_index, time / self.step) - self.earned_per_gh(scenario_index, self.segment_step[scenario_index, segment])
+
+        return {
+            "balance": self.segment_balance[scenario_index, segment] + bonused_power * earned,
+            "unbonused_power": unbonused_power,
+            "bonused_power": bonused_power,
+            "bonus": bonus,
+            "reward": bonused_power * self.reward_per_gh(scenario_index, time / self.step)
+        }
+
+    def segment_of_times(self):
+        # Index of the segment each history value belongs to, which is the number of purchases made before its time
+        if self._segment is None:
+            times = self.times()
+            purchases = np.zeros((len(self), len(times) + 1), dtype = np.int32)
+            rows, columns = np.nonzero(self.segment_step[:, 1:] < self.steps)
+            first_affected = np.searchsorted(times, self.segment_time()[rows, columns + 1], side = "right")
+            np.add.at(purchases, (rows, first_affected), 1)
+            self._segment = np.cumsum(purchases[:, :len(times)], axis = 1, dtype = np.int32)
+        return self._segment
+
+    def history(self, field):
+        # Returns the (scenario x history time) array of one of the HISTORY_FIELDS
+        if field not in HISTORY_FIELDS:
+            raise ValueError(f"Unknown history field ({field}).")
+
+        if field not in self._histories:
+            segment = self.segment_of_times()
+            rows = np.arange(len(self))[:, None]
+            steps = np.broadcast_to(self.history_steps(), segment.shape)
+
+            if field == "unbonused_power":
+                value = np.take_along_axis(self.segment_power, segment, axis = 1)
+            elif field == "bonus":
+                value = np.take_along_axis(self.segment_bonus, segment, axis = 1)
+            else:
+                # Always in full precision, the other fields are computed from it
+                bonused_power = np.take_along_axis(self.segment_power * (1 + self.segment_bonus), segment, axis = 1)
+                if field == "bonused_power":
+                    value = bonused_power
+                elif field == "reward":
+                    value = bonused_power * self.reward_per_gh(rows, steps)
+                else:
+                    segment_step = np.take_along_axis(self.segment_step, segment, axis = 1)
+                    earned = self.earned_per_gh(rows, steps) - self.earned_per_gh(rows, segment_step)
+                    value = np.take_along_axis(self.segment_balance, segment, axis = 1) + bonused_power * earned
+
+            self._histories[field] = value.astype(self.history_dtype, copy = False)
+
+        return self._histories[field]
+
+    def histories(self):
+        return {field: self.history(field) for field in HISTORY_FIELDS}
+
+    def history_nbytes(self):
+        # Memory used by the histories filled in so far
+        return sum(value.nbytes for value in self._histories.values())
+
+    def balance_curve(self, scenario_index):
+        # Returns the (times, balances) to plot for a scenario: the balance history plus two points
+        # at the exact time of each purchase (right before and right after it).
+        purchase_times = self.purchase_times(scenario_index)
+        count = len(purchase_times)
+
+        bonused_power = self.segment_power[scenario_index, :count] * (1 + self.segment_bonus[scenario_index, :count])
+        earned = self.earned_per_gh(scenario_index, self.segment_step[scenario_index, 1:count + 1]) \
+                 - self.earned_per_gh(scenario_index, self.segment_step[scenario_index, :count])
+        before = self.segment_balance[scenario_index, :count] + bonused_power * earned
+        after = self.segment_balance[scenario_index, 1:count + 1]
+
+        times = np.concatenate((self.times(), purchase_times, purchase_times))
+        balances = np.concatenate((self.history("balance")[scenario_index], before, after))
+        after_purchase = np.concatenate((np.zeros(len(times) - count, dtype = bool), np.ones(count, dtype = bool)))
+
+        order = np.lexsort((after_purchase, times))
+        return times[order], balances[order]
+
+    def steps_to_earn(self, rows, earned):
+        # Inverse of earned_per_gh: number of steps (with a fraction) after which 1 Gh/s (with bonus) has
+        # earned `earned` RLT, rows and earned being (scenario x ...) arrays. Returns inf when it never does.
+        if self.cumulative_yield is None:
+            with np.errstate(divide = "ignore", invalid = "ignore"):
+                steps = np.where(earned > 0, earned / self.step_yield, 0)
+            return np.where(steps <= self.steps, steps, np.inf)
+
+        if self.cumulative_yield.ndim == 1:
+            after = np.searchsorted(self.cumulative_yield, earned, side = "left")
+        else:
+            after = searchsorted_rows(self.cumulative_yield, earned)
+        last_step = self.cumulative_yield.shape[-1] - 1
+        reached = after <= last_step
+        after = np.clip(after, 1, last_step)
+
+        # The yield is the same during the whole step, so the balance is linear inside it
+        if self.cumulative_yield.ndim == 1:
+            start, end = self.cumulative_yield[after - 1], self.cumulative_yield[after]
+        else:
+            start, end = self.cumulative_yield[rows, after - 1], self.cumulative_yield[rows, after]
+        with np.errstate(divide = "ignore", invalid = "ignore"):
+            steps = after - 1 + np.clip((earned - start) / (end - start), 0, 1)
+        return np.where(reached, np.where(earned > 0, steps, 0), np.inf)
+
+    def time_to(self, field, target):
+        # Exact time at which each scenario first reaches `target` (a number or one value per scenario)
+        # in one of the GOAL_FIELDS, in the same units as the histories. NaN when it isn't reached within
+        # the projection. Solved on the segments directly, so nothing gets simulated day by day.
+        if field not in GOAL_FIELDS:
+            raise ValueError(f"Unknown goal field ({field}).")
+
+        target = np.broadcast_to(np.asarray(target, dtype = float), (len(self),))[:, None]
+        reached = self.segment_step < self.steps
+        reached[:, 0] = True
+
+        if field == "balance":
+            # The balance only drops at purchases, so inside a segment it crosses the target at most once
+            bonused_power = self.segment_power * (1 + self.segment_bonus)
+            rows = np.arange(len(self))[:, None]
+            start_earned = self.earned_per_gh(rows, self.segment_step)
+            with np.errstate(divide = "ignore", invalid = "ignore"):
+                missing_earned = np.where(self.segment_balance < target, (target - self.segment_balance) / bonused_power, 0)
+            crossing = self.steps_to_earn(rows, start_earned + missing_earned)
+
+            segment_end = np.append(self.segment_step[:, 1:], np.full((len(self), 1), self.steps), axis = 1)
+            crossing = np.where(reached & (crossing <= segment_end), crossing, np.inf)
+        else:
+            if field == "unbonused_power":
+                value = self.segment_power
+            elif field == "bonus":
+                value = self.segment_bonus
+            else:
+                value = self.segment_power * (1 + self.segment_bonus)
+            # Powers and bonuses only change at purchases, and never go down
+            crossing = np.where(reached & (value >= target), self.segment_step, np.inf)
+
+        time = crossing.min(axis = 1) * self.step
+        return np.where(np.isfinite(time), time, np.nan)
+
+def join_projections(projections):
+    # Joins the projections of consecutive chunks of scenarios (made with the same parameters, like the
+    # ones of parallel.submit_projections in order of their start index) into a single Projection.
+    first = projections[0]
+    width = max(projection.segment_step.shape[1] for projection in projections)
+
+    def join(arrays, fill):
+        return np.concatenate([np.pad(array, ((0, 0), (0, width - array.shape[1])), constant_values = fill) for array in arrays])
+
+    step_yield, cumulative_yield = first.step_yield, first.cumulative_yield
+    if np.ndim(step_yield) == 2:
+        step_yield = np.concatenate([projection.step_yield for projection in projections])
+        cumulative_yield = np.concatenate([projection.cumulative_yield for projection in projections])
+
+    joined = Projection(first.days, first.step, step_yield,
+                        join([projection.segment_step for projection in projections], first.steps),
+                        join([projection.segment_balance for projection in projections], 0),
+                        join([projection.segment_power for projection in projections], 0),
+                        join([projection.segment_bonus for projection in projections], 0),
+                        first.history_interval, cumulative_yield, first.history_dtype)
+
+    # Histories every chunk already filled in don't have to be filled again
+    for field in HISTORY_FIELDS:
+        if all(field in projection._histories for projection in projections):
+            joined._histories[field] = np.concatenate([projection._histories[field] for projection in projections])
+    return joined
+
+def steps_in(days, step):
+    # Number of steps of length `step` in `days`
+    steps = round(days / step)
+    if abs(steps * step - days) > 1e-9 * max(days, 1):
+        raise ValueError(f"The duration ({days} days) isn't a whole number of steps ({step} days).")
+    return steps
+
+def step_yields(network_power, block_reward, steps, step):
+    # Returns the RLT earned by 1 Gh/s (with bonus) during each step. network_power and block_reward
+    # are either numbers, arrays with one value per step, or (scenario x step) arrays.
+    # The network power must stay above 0 and the block reward can't be negative, otherwise the
+    # yield isn't finite or makes balances go down, and purchases can't be searched for anymore.
+    network_power = np.asarray(network_power, dtype = float)
+    block_reward = np.asarray(block_reward, dtype = float)
+    if not np.all(network_power > 0) or not np.all(np.isfinite(network_power)):
+        raise ValueError(f"The network power must be above 0 (it goes down to {np.nanmin(network_power):g} Gh/s).")
+    if not np.all(block_reward >= 0) or not np.all(np.isfinite(block_reward)):
+        raise ValueError(f"The block reward can't be negative (it goes down to {np.nanmin(block_reward):g} RLT).")
+    step_yield = block_reward / network_power * BLOCKS_PER_DAY * step
+    if step_yield.ndim == 0:
+        return float(step_yield)
+    if step_yield.shape[-1] != steps:
+        raise ValueError(f"Expected one network power and block reward per step ({steps} steps), got {step_yield.shape[-1]}.")
+    return step_yield
+
+def cumulative_yields(step_yield):
+    # RLT earned by 1 Gh/s (with bonus) from the start until the start of each step (plus the end of the last one).
+    # Not needed when the yield is the same on every step.
+    if np.ndim(step_yield) == 0:
+        return None
+    cumulative_yield = np.zeros(np.shape(step_yield)[:-1] + (np.shape(step_yield)[-1] + 1,))
+    np.cumsum(step_yield, axis = -1, out = cumulative_yield[..., 1:])
+    return cumulative_yield
+
+def yield_until(step_yield, cumulative_yield, rows, steps):
+    # RLT earned by 1 Gh/s (with bonus) until `steps` steps have passed (interpolated inside a step)
+    if cumulative_yield is None:
+        return steps * step_yield
+
+    last_step = cumulative_yield.shape[-1] - 1
+    if np.issubdtype(np.asarray(steps).dtype, np.integer):
+        # Whole steps, no need to interpolate
+        steps = np.clip(steps, 0, last_step)
+        return cumulative_yield[steps] if cumulative_yield.ndim == 1 else cumulative_yield[rows, steps]
+
+    steps = np.clip(steps, 0, last_step)
+    before = np.minimum(np.floor(steps).astype(np.int64), last_step - 1)
+    if cumulative_yield.ndim == 1:
+        start, end = cumulative_yield[before], cumulative_yield[before + 1]
+    else:
+        start, end = cumulative_yield[rows, before], cumulative_yield[rows, before + 1]
+    return start + (end - start) * (steps - before)
+
+def shift_rows(cumulative_yield):
+    # Shifts every row of a (scenario x step) cumulative yield above the previous one,
+    # so all rows can be searched as a single sorted array. Returns the shifted array and the shift.
+    highest = cumulative_yield[:, -1].max()
+    offset = 2 * highest if highest > 0 else 1
+    return (cumulative_yield + np.arange(len(cumulative_yield))[:, None] * offset).ravel(), offset
+
+def searchsorted_rows(cumulative_yield, targets, shifted_rows = None):
+    # First step at which the cumulative yield of each scenario reaches its target (like np.searchsorted,
+    # but every scenario can have its own cumulative yield). Returns the number of steps + 1 when it never does.
+    if cumulative_yield.ndim == 1:
+        return np.searchsorted(cumulative_yield, targets, side = "left")
+
+    shifted, offset = shifted_rows or shift_rows(cumulative_yield)
+    row_count, length = cumulative_yield.shape
+    # Every scenario can also have several targets, one per column
+    row_index = np.arange(row_count).reshape((-1,) + (1,) * (np.ndim(targets) - 1))
+    row_end = cumulative_yield[:, -1].reshape(row_index.shape)
+    # Targets that are never reached must not spill into the next row
+    targets = np.minimum(targets, row_end + offset / 4) + row_index * offset
+    return np.searchsorted(shifted, targets, side = "left") - row_index * length
+
+def project(balance, total_power, total_bonus, network_power, block_reward, days, scenarios,
+            step = 1, history_interval = 1, history_dtype = "float64"):
+    # Solves the purchase events of every scenario and returns them as a Projection.
+    # All powers are in Gh/s, bonuses are percentages and prices are in RLT.
+    # Purchases happen at the start of a step, `step` is in days and can go down to
+    # a single block (1 / BLOCKS_PER_DAY). Histories are sampled every `history_interval` days
+    # and stored as `history_dtype` (see HISTORY_DTYPES).
+    # network_power and block_reward can also change over time, see step_yields.
+    step_yield = step_yields(network_power, block_reward, steps_in(days, step), step)
+    return project_packed(balance, total_power, total_bonus, step_yield, days, *pack_scenarios(scenarios),
+                          step = step, history_interval = history_interval, history_dtype = history_dtype)
+
+def project_packed(balance, total_power, total_bonus, step_yield, days, hashrates, bonuses, prices,
+                   step = 1, history_interval = 1, cumulative_yield = None, history_dtype = "float64"):
+    # Same as project, with the scenarios already packed by pack_scenarios and the yields computed
+    # by step_yields (and optionally cumulative_yields), so they can be reused between calls.
+
+    # Between two purchases the power is constant, so the balance grows by power * yield. When the
+    # yield is constant, the step a miner becomes affordable on is ceil((price - balance) / step_reward),
+    # otherwise it's found with a binary search on the cumulative yield. We jump from one purchase to
+    # the next for all scenarios together, so the cost depends on the number of miners and not on the
+    # number of steps.
+    scenario_count, miner_count = prices.shape
+    steps = steps_in(days, step)
+    if cumulative_yield is None:
+        cumulative_yield = cumulative_yields(step_yield)
+
+    segment_step = np.full((scenario_count, miner_count + 1), steps, dtype = np.int64)
+    segment_balance = np.zeros((scenario_count, miner_count + 1))
+    segment_power = np.zeros((scenario_count, miner_count + 1))
+    segment_bonus = np.zeros((scenario_count, miner_count + 1))
+
+    segment_step[:, 0] = 0
+    segment_balance[:, 0] = balance
+    segment_power[:, 0] = total_power
+    segment_bonus[:, 0] = total_bonus / 100
+
+    solve_purchases(step_yield, cumulative_yield, steps, hashrates, bonuses, prices,
+                    segment_step, segment_balance, segment_power, segment_bonus)
+    return Projection(days, step, step_yield, segment_step, segment_balance, segment_power, segment_bonus,
+                      history_interval, cumulative_yield, history_dtype)
+
+def solve_purchases(step_yield, cumulative_yield, steps, hashrates, bonuses, prices,
+                    segment_step, segment_balance, segment_power, segment_bonus, first_miner = None):
+    # Fills the segments of project_packed in place. Scenarios start from their segment `first_miner`
+    # (one per scenario, 0 by default), which has to be filled in already, like a checkpoint to resume from.
+    scenario_count, miner_count = prices.shape
+    if first_miner is None:
+        first_miner = np.zeros(scenario_count, dtype = np.int64)
+
+    rows = np.arange(scenario_count)
+    shifted_rows = shift_rows(cumulative_yield) if np.ndim(cumulative_yield) == 2 else None
+    active = np.ones(scenario_count, dtype = bool) # Scenarios that bought every miner so far
+    for k in range(first_miner.min(initial = miner_count), miner_count):
+        # Scenarios that start later already have this segment
+        resumed = first_miner <= k
+        bonused_power = segment_power[:, k] * (1 + segment_bonus[:, k])
+        missing = prices[:, k] - segment_balance[:, k]
+
+        # Step on which the miner becomes affordable. When the balance already covers it, it gets
+        # bought on the same step as the previous miner, so a step can drain several purchases.
+        with np.errstate(divide = "ignore", invalid = "ignore"):
+            if cumulative_yield is None:
+                purchase_step = segment_step[:, k] + np.ceil(missing / (bonused_power * step_yield))
+            else:
+                start_yield = yield_until(step_yield, cumulative_yield, rows, segment_step[:, k])
+                purchase_step = searchsorted_rows(cumulative_yield, start_yield + missing / bonused_power, shifted_rows)
+        purchase_step = np.where(missing > 0, purchase_step, segment_step[:, k])
+
+        active &= ~resumed | (purchase_step < steps)
+        buying = active & resumed
+        if not active.any():
+            break
+
+        new_step = purchase_step[buying].astype(np.int64)
+        earned = yield_until(step_yield, cumulative_yield, rows[buying], new_step) \
+                 - yield_until(step_yield, cumulative_yield, rows[buying], segment_step[buying, k])
+
+        segment_step[buying, k + 1] = new_step
+        segment_balance[buying, k + 1] = segment_balance[buying, k] + bonused_power[buying] * earned - prices[buying, k]
+        segment_power[buying, k + 1] = segment_power[buying, k] + hashrates[buying, k]
+        segment_bonus[buying, k + 1] = segment_bonus[buying, k] + bonuses[buying, k] / 100
+
+def simulate_batch(balance, total_power, total_bonus, network_power, block_reward, days, scenarios, step = 1):
+    # Projects every scenario at once and returns a dict mapping the names in HISTORY_FIELDS
+    # to (scenario x day) arrays.
+    return project(balance, total_power, total_bonus, network_power, block_reward, days, scenarios, step).histories()
+
+def simulate(balance, total_power, total_bonus, network_power, block_reward, days, scenarios, step = 1):
+    # Projects every scenario and returns a list of histories (one dict per scenario),
+    # each one mapping the names in HISTORY_FIELDS to an array of `days` values.
+    batch = simulate_batch(balance, total_power, total_bonus, network_power, block_reward, days, scenarios, step)
+    return [{field: batch[field][index] for field in HISTORY_FIELDS}
+            for index in range(len(scenarios))]
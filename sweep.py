@@ -0,0 +1,126 @@
+# Parameter sweep.
+# Varies global inputs and miner fields over a grid and projects every combination in a single batch,
+# to see how sensitive a plan is to, for example, the network power or the price of a miner.
+import numpy as np
+
+from simulation import MINER_FIELDS, pack_scenarios, project_packed, step_yields, steps_in
+
+SWEEP_PARAMETERS = ("balance", "total_power", "total_bonus", "network_power", "block_reward")
+
+def parameter_name(parameter):
+    # Readable name of a swept parameter, miner fields are (field, scenario index, miner index) tuples
+    if isinstance(parameter, tuple):
+        field, scenario_index, miner_index = parameter
+        return f"{field} of miner {miner_index + 1} in scenario {scenario_index + 1}"
+    return parameter
+
+def sweep(balance, total_power, total_bonus, network_power, block_reward, days, scenarios, axes,
+          step = 1, goal = None):
+    # Projects every scenario for every combination of the values in `axes`, a list of (parameter, values)
+    # where parameter is one of SWEEP_PARAMETERS or a (field, scenario index, miner index) tuple for a field
+    # in MINER_FIELDS. Returns a dict with:
+    #   - "parameters" and "values": the axes of the grid.
+    #   - "final_balance": (axis 1 x ... x axis n x scenario) array of the balance at the end of the projection.
+    #   - "time_to_goal": same, days until the balance reaches `goal` (NaN when it doesn't), only with a goal.
+    # The other arguments are the ones of simulation.project, network_power and block_reward can be schedules.
+    for parameter, values in axes:
+        if isinstance(parameter, tuple):
+            field, scenario_index, miner_index = parameter
+            if field not in MINER_FIELDS:
+                raise ValueError(f"Unknown miner field ({field}).")
+            if not (0 <= scenario_index < len(scenarios) and 0 <= miner_index < len(scenarios[scenario_index])):
+                raise ValueError(f"There is no {parameter_name(parameter)}.")
+        elif parameter not in SWEEP_PARAMETERS:
+            raise ValueError(f"Unknown parameter ({parameter}).")
+        if len(values) == 0:
+            raise ValueError(f"No values to sweep {parameter_name(parameter)} over.")
+
+    steps = steps_in(days, step)
+    grid_shape = tuple(len(values) for _, values in axes)
+    grids = [grid.ravel() for grid in np.meshgrid(*[np.asarray(values, dtype = float) for _, values in axes], indexing = "ij")]
+    combination_count = int(np.prod(grid_shape))
+
+    # One row per combination and scenario (combination major), so every row is an independent scenario
+    hashrates, bonuses, prices = pack_scenarios(scenarios)
+    scenario_count = len(scenarios)
+    miners = {field: np.repeat(array[None], combination_count, axis = 0)
+              for field, array in zip(MINER_FIELDS, (hashrates, bonuses, prices))}
+    parameters = {
+        "balance": np.full(combination_count, float(balance)),
+        "total_power": np.full(combination_count, float(total_power)),
+        "total_bonus": np.full(combination_count, float(total_bonus))
+    }
+
+    swept = set()
+    for (parameter, _), values in zip(axes, grids):
+        if isinstance(parameter, tuple):
+            field, scenario_index, miner_index = parameter
+            miners[field][:, scenario_index, miner_index] = values
+        else:
+            parameters[parameter] = values
+            swept.add(parameter)
+
+    # Yields stay shared by every row unless the network power or block reward are swept
+    if swept & {"network_power", "block_reward"}:
+        network_power = parameters["network_power"][:, None] if "network_power" in swept else np.asarray(network_power, dtype = float)
+        block_reward = parameters["block_reward"][:, None] if "block_reward" in swept else np.asarray(block_reward, dtype = float)
+        step_yield = step_yields(np.broadcast_to(network_power, (combination_count, steps)),
+                                 np.broadcast_to(block_reward, (combination_count, steps)), steps, step)
+        step_yield = np.repeat(step_yield, scenario_count, axis = 0)
+    else:
+        step_yield = step_yields(network_power, block_reward, steps, step)
+
+    projection = project_packed(np.repeat(parameters["balance"], scenario_count),
+                                np.repeat(parameters["total_power"], scenario_count),
+                                np.repeat(parameters["total_bonus"], scenario_count),
+                                step_yield, days,
+                                *[miners[field].reshape(combination_count * scenario_count, -1) for field in MINER_FIELDS],
+                                step = step, history_interval = days) # Only the final balance is needed
+
+    result = {
+        "parameters": [parameter for parameter, _ in axes],
+        "values": [np.asarray(values, dtype = float) for _, values in axes],
+        "final_balance": projection.history("balance")[:, -1].reshape(grid_shape + (scenario_count,))
+    }
+    if goal is not None:
+        result["time_to_goal"] = projection.time_to("balance", goal).reshape(grid_shape + (scenario_count,))
+    return result
+
+def plot_sweep(result, path = None):
+    # Small multiples: one column per scenario, one row per result (final balance, then time to goal).
+    # One swept parameter gives lines, two give heatmaps. Saves to `path` when given, otherwise returns the figure.
+    import matplotlib
+    if path is not None:
+        matplotlib.use("Agg") # No window
+    import matplotlib.pyplot as plt
+
+    if len(result["values"]) not in (1, 2):
+        raise ValueError("Only sweeps over one or two parameters can be drawn.")
+
+    metrics = [("final_balance", "Final RLT")] + ([("time_to_goal", "Days to goal")] if "time_to_goal" in result else [])
+    scenario_count = result["final_balance"].shape[-1]
+    fig, axes = plt.subplots(len(metrics), scenario_count, squeeze = False,
+                             figsize = (4 * scenario_count + 1, 3.5 * len(metrics)))
+
+    names = [parameter_name(parameter) for parameter in result["parameters"]]
+    for row, (metric, label) in enumerate(metrics):
+        for scenario in range(scenario_count):
+            ax = axes[row, scenario]
+            values = result[metric][..., scenario]
+            if len(names) == 1:
+                ax.plot(result["values"][0], values)
+                ax.set_ylabel(label)
+            else:
+                x, y = result["values"][1], result["values"][0]
+                mesh = ax.pcolormesh(x, y, values, shading = "nearest", cmap = "viridis")
+                fig.colorbar(mesh, ax = ax, label = label)
+                ax.set_ylabel(names[0])
+            ax.set_xlabel(names[-1])
+            if row == 0:
+                ax.set_title(f"Scenario {scenario + 1}")
+
+    fig.tight_layout()
+    if path is None:
+        return fig
+    fig.savefig(path)
+    plt.close(fig)
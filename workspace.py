@@ -0,0 +1,246 @@
+# Workspaces.
+# Saves everything typed in the window (the main parameters and every scenario) so it can be opened again.
+# Values are kept as typed, like "15.7 Ph/s" or "12.5 * 2", and miners that aren't filled in yet are kept too.
+# Miners added from a catalog also keep their catalog id next to their values, and the workspace keeps
+# the path of the catalog (relative to the workspace, like in roller_cli.py).
+#
+# Binary format (.rltw), little endian:
+#   "RLTW" | version (uint16) | length of the parameters (uint32) | parameters as UTF-8 JSON
+#   number of scenarios (uint32) | start of each scenario in the data, plus the end of the last one (uint64 each)
+#   data: every scenario compressed on its own, so any of them can be read without the others.
+#   Version 1 had no catalog ids, its scenarios are still read.
+# Workspaces can also be exported to JSON, in the same format as the input files of roller_cli.py.
+# Opening such a file only accepts what the window can show: numbers are fine (powers in Gh/s like in
+# roller_cli.py) and so are catalog ids when the file sets a catalog, but schedules and currencies raise a ValueError.
+from collections.abc import MutableSequence
+import json
+import os
+import struct
+import zlib
+
+from catalog import MinerCatalog
+from simulation import format_power, parse_power, power_units
+
+MAGIC = b"RLTW"
+VERSION = 2
+WORKSPACE_FORMATS = {".rltw": "binary", ".json": "json"}
+PARAMETER_FIELDS = ("balance", "power", "bonus", "network_power", "block_reward", "days")
+MINER_FIELDS = ("hashrate", "bonus", "price")
+SAVED_MINER_FIELDS = MINER_FIELDS + ("id",) # "id" is the catalog id, None for miners that were typed
+POWER_FIELDS = ("power", "network_power", "hashrate") # Shown as a number and a unit in the window
+
+# Separators inside a scenario, entries can't contain control characters
+FIELD_SEPARATOR = "\x1f"
+MINER_SEPARATOR = "\x1e"
+
+HEADER = struct.Struct("<4sHI")
+COUNT = struct.Struct("<I")
+
+def catalog_miner(catalog, miner_id):
+    # Miner of a catalog as the window shows it, with its id next to the values
+    miner = catalog[miner_id]
+    return {
+        "hashrate": format_power(miner.hashrate),
+        "bonus": f"{miner.bonus:.10g}",
+        "price": f"{miner.price:.10g}",
+        "id": str(miner_id)
+    }
+
+def encode_scenario(scenario):
+    # scenario example: [{"hashrate": "15.7 Ph/s", "bonus": "2", "price": None, "id": None}, ...other miners]
+    text = MINER_SEPARATOR.join(FIELD_SEPARATOR.join(miner.get(field) or "" for field in SAVED_MINER_FIELDS) for miner in scenario)
+    return zlib.compress(text.encode("utf-8"))
+
+def decode_scenario(data):
+    try:
+        text = zlib.decompress(data).decode("utf-8")
+    except zlib.error:
+        raise ValueError("Broken scenario in workspace.")
+    if not text:
+        return []
+    scenario = []
+    for miner in text.split(MINER_SEPARATOR):
+        values = miner.split(FIELD_SEPARATOR)
+        if len(values) not in (len(MINER_FIELDS), len(SAVED_MINER_FIELDS)):
+            raise ValueError("Broken scenario in workspace.")
+        values += [""] * (len(SAVED_MINER_FIELDS) - len(values))
+        scenario.append({field: value or None for field, value in zip(SAVED_MINER_FIELDS, values)})
+    return scenario
+
+class LazyScenarios(MutableSequence):
+    # List of the scenarios of a binary workspace, each one only gets decompressed the first time
+    # it's used, so opening a workspace doesn't depend on how many scenarios it holds.
+    def __init__(self, data, offsets):
+        self.items = [(data, offsets[i], offsets[i + 1]) for i in range(len(offsets) - 1)]
+        self.decoded = [None] * len(self.items)
+
+    def encoded(self, index):
+        # Compressed bytes of a scenario that wasn't used yet (None otherwise), saving copies them as they are
+        if self.decoded[index] is not None:
+            return None
+        data, start, end = self.items[index]
+        return bytes(data[start:end])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if self.decoded[index] is None:
+            data, start, end = self.items[index]
+            self.decoded[index] = decode_scenario(data[start:end])
+        return self.decoded[index]
+
+    def __setitem__(self, index, scenario):
+        self.decoded[index] = scenario
+
+    def __delitem__(self, index):
+        del self.items[index]
+        del self.decoded[index]
+
+    def __len__(self):
+        return len(self.items)
+
+    def insert(self, index, scenario):
+        self.items.insert(index, None)
+        self.decoded.insert(index, scenario)
+
+def read_json_value(value, field, place):
+    # Value of a JSON workspace as the window shows it, `place` is only used in errors ("Miner 2 in scenario 1")
+    if value is None or value == "":
+        return None
+    if isinstance(value, (dict, list)):
+        raise ValueError(f"{place}: `{field}` is a schedule, schedules can only be projected with roller_cli.py.")
+    if field not in POWER_FIELDS:
+        return str(value)
+
+    if isinstance(value, str):
+        parts = value.rsplit(None, 1)
+        if len(parts) == 2 and parts[1] in power_units:
+            return value
+    try:
+        return format_power(parse_power(value))
+    except (ValueError, ZeroDivisionError) as error:
+        raise ValueError(f"{place}: invalid `{field}` ({error}).")
+
+def read_json_workspace(data, directory):
+    # `directory` is the one of the file, catalog paths are relative to it
+    if not isinstance(data, dict):
+        raise ValueError("A JSON workspace must hold an object with the main parameters and the scenarios.")
+    if data.get("currencies"):
+        raise ValueError("This file mines several currencies, which can only be projected with roller_cli.py.")
+
+    parameters = {field: read_json_value(data.get(field), field, "Main parameters") for field in PARAMETER_FIELDS}
+    catalog = None
+    if data.get("catalog"):
+        parameters["catalog"] = os.path.normpath(os.path.join(directory, data["catalog"]))
+        catalog = MinerCatalog.read(parameters["catalog"])
+
+    scenarios = []
+    for i, scenario in enumerate(data.get("scenarios") or []):
+        if not isinstance(scenario, list):
+            raise ValueError(f"Scenario {i + 1} must be a list of miners.")
+        miners = []
+        for j, miner in enumerate(scenario):
+            if not isinstance(miner, dict) or set(miner) == {"id"}:
+                # Id of a catalog miner
+                miner_id = miner["id"] if isinstance(miner, dict) else miner
+                if catalog is None:
+                    raise ValueError(f"Miner {j + 1} in scenario {i + 1} refers to a catalog, but no `catalog` is set.")
+                if miner_id not in catalog:
+                    raise ValueError(f"Miner {j + 1} in scenario {i + 1}: there is no miner with id {miner_id} in the catalog.")
+                miners.append(catalog_miner(catalog, miner_id))
+                continue
+            miner_values = {field: read_json_value(miner.get(field), field, f"Miner {j + 1} in scenario {i + 1}")
+                            for field in MINER_FIELDS}
+            miner_values["id"] = None if miner.get("id") in (None, "") else str(miner["id"])
+            miners.append(miner_values)
+        scenarios.append(miners)
+    return parameters, scenarios
+
+def relative_catalog_path(catalog_path, path):
+    # Path of the catalog from the directory of the workspace, so both can be moved together
+    try:
+        return os.path.relpath(catalog_path, os.path.dirname(os.path.abspath(path)))
+    except ValueError:
+        return os.path.abspath(catalog_path) # Another drive on Windows
+
+def save_workspace(path, parameters, scenarios):
+    # parameters example: {"balance": "12.5", "power": "2.679 Ph/s", "bonus": "1.91", "network_power": "5.3 Eh/s",
+    #                      "block_reward": "30", "days": "365", "catalog": "C:/markets/market.csv"}, empty fields are None.
+    # The format comes from the extension of `path` (see WORKSPACE_FORMATS).
+    workspace_format = WORKSPACE_FORMATS.get(os.path.splitext(path)[1].lower())
+    if workspace_format is None:
+        raise ValueError(f"Unknown workspace format ({path}), expected one of: {', '.join(WORKSPACE_FORMATS)}.")
+    catalog_path = parameters.get("catalog")
+    parameters = {field: parameters.get(field) or None for field in PARAMETER_FIELDS}
+    if catalog_path:
+        parameters["catalog"] = relative_catalog_path(catalog_path, path)
+
+    if workspace_format == "json":
+        # Ids are only written for catalog miners, like the input files of roller_cli.py
+        scenarios = [[{field: value for field, value in miner.items() if field != "id" or value is not None} for miner in scenario]
+                     for scenario in scenarios]
+        with open(path, "w") as file:
+            json.dump({**parameters, "scenarios": scenarios}, file, indent = 4)
+        return
+
+    blocks = []
+    for index in range(len(scenarios)):
+        block = scenarios.encoded(index) if isinstance(scenarios, LazyScenarios) else None
+        blocks.append(block if block is not None else encode_scenario(scenarios[index]))
+
+    offsets = [0]
+    for block in blocks:
+        offsets.append(offsets[-1] + len(block))
+
+    parameters = json.dumps(parameters, separators = (",", ":")).encode("utf-8")
+    # Write to a temporary file first, so a crash never leaves half a workspace behind
+    temporary_path = path + ".tmp"
+    with open(temporary_path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, len(parameters)))
+        file.write(parameters)
+        file.write(COUNT.pack(len(blocks)))
+        file.write(struct.pack(f"<{len(offsets)}Q", *offsets))
+        file.writelines(blocks)
+    os.replace(temporary_path, path)
+
+def load_workspace(path):
+    # Returns (parameters, scenarios) as given to save_workspace. The scenarios of binary
+    # workspaces are a LazyScenarios, which can be used like a list.
+    workspace_format = WORKSPACE_FORMATS.get(os.path.splitext(path)[1].lower())
+    if workspace_format is None:
+        raise ValueError(f"Unknown workspace format ({path}), expected one of: {', '.join(WORKSPACE_FORMATS)}.")
+
+    if workspace_format == "json":
+        with open(path) as file:
+            return read_json_workspace(json.load(file), os.path.dirname(path))
+
+    with open(path, "rb") as file:
+        data = memoryview(file.read())
+
+    if len(data) < HEADER.size:
+        raise ValueError(f"{path} isn't a workspace.")
+    magic, version, parameters_length = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"{path} isn't a workspace.")
+    if version > VERSION:
+        raise ValueError(f"{path} was saved by a newer version (format {version}), please update.")
+
+    position = HEADER.size
+    try:
+        parameters = json.loads(bytes(data[position:position + parameters_length]).decode("utf-8"))
+        position += parameters_length
+        scenario_count, = COUNT.unpack_from(data, position)
+        position += COUNT.size
+        offsets = struct.unpack_from(f"<{scenario_count + 1}Q", data, position)
+        position += 8 * (scenario_count + 1)
+    except struct.error:
+        raise ValueError(f"{path} is incomplete.")
+    if not isinstance(parameters, dict):
+        raise ValueError(f"{path} isn't a workspace.")
+
+    # Every scenario has to be inside the data, one after the other, up to the end of the file
+    if offsets[0] != 0 or any(end < start for start, end in zip(offsets, offsets[1:])) or position + offsets[-1] != len(data):
+        raise ValueError(f"{path} is incomplete.")
+    if parameters.get("catalog"):
+        parameters["catalog"] = os.path.normpath(os.path.join(os.path.dirname(path), parameters["catalog"]))
+    return parameters, LazyScenarios(data[position:], offsets)